@@ -57,8 +57,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
 ]
 
+# Per-view query budgets checked by core.middleware.QueryInstrumentationMiddleware
+QUERY_BUDGET = 30
+QUERY_BUDGETS = {
+    'quiz:leaderboard': 20,
+    'reference:reference_home': 20,
+}
+
 ROOT_URLCONF = 'SagaAHA.urls'
 
 TEMPLATES = [
@@ -91,6 +99,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'saga-aha',
+    }
+}
+
+# Public content pages are cached for anonymous visitors (see core.cache). Keys
+# include the content version shared through the database, so a change made by
+# any process retires every worker's local copy; the timeout bounds memory use.
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Seconds a worker may keep using the content version it last read from the
+# database (core.indexes) before checking again
+CONTENT_VERSION_TTL = 1
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -131,6 +159,9 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# Map tiles written by build_map_tiles sit under a content hash directory and never change
+WHITENOISE_IMMUTABLE_FILE_TEST = rf'^{STATIC_URL}map-tiles/[0-9a-f]{{16}}/'
+
 # Media files (User uploaded content)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
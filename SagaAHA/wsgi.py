@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SagaAHA.settings')
 
 application = get_wsgi_application()
+
+# Build the in-memory content indexes (autocomplete etc.) before serving requests
+from core.indexes import warm_indexes  # noqa: E402
+
+warm_indexes()
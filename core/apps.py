@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Register the in-memory indexes so warm_indexes() can build them at startup
+        from . import autocomplete, featured, world  # noqa: F401
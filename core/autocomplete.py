@@ -0,0 +1,55 @@
+from array import array
+from bisect import bisect_left
+
+from .content import CONTENT_KINDS, KINDS_BY_KEY
+from .indexes import ContentIndex
+from .text import normalize_key
+
+
+def build_prefix_index():
+    """Sorted keys for every word-suffix of every entity name in both languages"""
+    items = []  # (label, kind key, object id)
+    suffixes = []  # (key, item position)
+    for kind in CONTENT_KINDS:
+        title_field, title_is_field = kind.title_fields
+        rows = kind.model.objects.values_list('pk', title_field, title_is_field)
+        for object_id, title, title_is in rows.iterator():
+            for label in dict.fromkeys([title_is, title]):
+                words = normalize_key(label).split()
+                if not words:
+                    continue
+                position = len(items)
+                items.append((label, kind.key, object_id))
+                # Index each word start so 'caesar' finds 'Gaius Julius Caesar'
+                for start in range(len(words)):
+                    suffixes.append((' '.join(words[start:]), position))
+    suffixes.sort()
+    keys = [key for key, position in suffixes]
+    positions = array('l', (position for key, position in suffixes))
+    return keys, positions, items
+
+
+prefix_index = ContentIndex('autocomplete', build_prefix_index)
+
+
+def complete(query, limit=10):
+    """Return up to limit entities whose name has a word starting with query"""
+    prefix = normalize_key(query)
+    if not prefix:
+        return []
+    keys, positions, items = prefix_index.get()
+    results = []
+    seen = set()
+    i = bisect_left(keys, prefix)
+    while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+        label, kind_key, object_id = items[positions[i]]
+        if (kind_key, object_id) not in seen:
+            seen.add((kind_key, object_id))
+            results.append({
+                'type': kind_key,
+                'id': object_id,
+                'label': label,
+                'url': KINDS_BY_KEY[kind_key].get_url(object_id),
+            })
+        i += 1
+    return results
@@ -0,0 +1,76 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from .indexes import content_changed_at, content_version
+
+
+def page_cache_key(request):
+    """Cache key for a public page: content version + language + full URL"""
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'page:{content_version()}:{get_language()}:{url}'
+
+
+def _is_cacheable(response):
+    # Responses that set cookies (e.g. a CSRF token) are specific to one visitor
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def cache_public_page(view):
+    """Serve anonymous GET requests for a content page from the cache
+
+    Keys include the content version, which the content signals bump on every
+    save, delete or m2m change, so cached pages never outlive the data they
+    were rendered from.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if _is_cacheable(response):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapped
+
+
+def conditional_object_page(model, pk_kwarg):
+    """ETag / Last-Modified handling for a detail page of one object
+
+    Both validators come from the object's updated_at and the shared content
+    version row, both read before the view runs, so a revalidation that
+    matches returns 304 without rendering. The content version changes with
+    any content the page may show (related events, derived tables), and being
+    stored in the database it is the same in every worker and across
+    restarts. The ETag also covers the viewer.
+    """
+    def updated_at(request, *args, **kwargs):
+        if not hasattr(request, '_object_updated_at'):
+            request._object_updated_at = model.objects.filter(pk=kwargs[pk_kwarg]).values_list(
+                'updated_at', flat=True).first()
+        return request._object_updated_at
+
+    def last_modified(request, *args, **kwargs):
+        value = updated_at(request, *args, **kwargs)
+        if value is None:
+            return None
+        return max(value, content_changed_at())
+
+    def etag(request, *args, **kwargs):
+        value = updated_at(request, *args, **kwargs)
+        if value is None:
+            return None
+        viewer = request.user.pk if request.user.is_authenticated else 0
+        tag = f'{model._meta.label}:{kwargs[pk_kwarg]}:{value.isoformat()}:{content_version()}:{viewer}'
+        return hashlib.md5(tag.encode()).hexdigest()
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
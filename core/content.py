@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.urls import reverse
+
+
+class ContentKind:
+    """A content model that can be searched, favorited and annotated"""
+
+    def __init__(self, key, code, model_label, results_key, title_fields, body_fields, url_name=None):
+        self.key = key  # Value stored in Favorite.content_type / UserNote.content_type
+        self.code = code  # Stable small integer used to build search index rowids
+        self.model_label = model_label
+        self.results_key = results_key
+        self.title_fields = title_fields  # (english, icelandic)
+        self.body_fields = body_fields  # List of (english, icelandic or None)
+        self.url_name = url_name
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def key_fields(self):
+        """Normalized search key columns (see core.models.SearchKeyMixin)"""
+        return list(self.model.search_key_fields)
+
+    def get_url(self, object_id):
+        if self.url_name:
+            return reverse(self.url_name, args=[object_id])
+        return None
+
+
+CONTENT_KINDS = [
+    ContentKind('period', 1, 'core.HistoricalPeriod', 'periods', ('name', 'name_is'),
+                [('description', 'description_is')]),
+    ContentKind('civilization', 2, 'core.Civilization', 'civilizations', ('name', 'name_is'),
+                [('region', None), ('description', 'description_is')]),
+    ContentKind('event', 3, 'timeline.TimelineEvent', 'events', ('title', 'title_is'),
+                [('region', None), ('description', 'description_is')],
+                url_name='timeline:event_detail'),
+    ContentKind('person', 4, 'reference.Person', 'people', ('name', 'name_is'),
+                [('biography', 'biography_is'), ('achievements', 'achievements_is')],
+                url_name='reference:person_detail'),
+    ContentKind('deity', 5, 'reference.Deity', 'deities', ('name', 'name_is'),
+                [('domain', 'domain_is'), ('symbols', 'symbols_is'), ('mythology', 'mythology_is'),
+                 ('cultural_significance', 'cultural_significance_is')],
+                url_name='reference:deity_detail'),
+    ContentKind('government', 6, 'reference.Government', 'governments', ('name', 'name_is'),
+                [('description', 'description_is'), ('examples', 'examples_is'),
+                 ('characteristics', 'characteristics_is')],
+                url_name='reference:government_detail'),
+    ContentKind('military_unit', 7, 'reference.MilitaryUnit', 'military_units', ('name', 'name_is'),
+                [('unit_type', None), ('description', 'description_is'), ('equipment', 'equipment_is'),
+                 ('tactics', 'tactics_is')]),
+    ContentKind('weapon', 8, 'reference.Weapon', 'weapons', ('name', 'name_is'),
+                [('weapon_type', None), ('description', 'description_is'), ('usage', 'usage_is')]),
+    ContentKind('battle', 9, 'reference.Battle', 'battles', ('name', 'name_is'),
+                [('location', None), ('description', 'description_is'), ('outcome', 'outcome_is'),
+                 ('significance', 'significance_is')],
+                url_name='reference:battle_detail'),
+    ContentKind('cultural_topic', 10, 'reference.CulturalTopic', 'cultural_topics', ('title', 'title_is'),
+                [('content', 'content_is')]),
+]
+
+KINDS_BY_KEY = {kind.key: kind for kind in CONTENT_KINDS}
+KINDS_BY_CODE = {kind.code: kind for kind in CONTENT_KINDS}
+KINDS_BY_LABEL = {kind.model_label: kind for kind in CONTENT_KINDS}
+
+
+def kind_for_model(model):
+    """Return the ContentKind registered for a model class, or None"""
+    return KINDS_BY_LABEL.get(model._meta.label)
+
+
+def resolve_content(references):
+    """Attach content_object and content_url to Favorite/UserNote rows
+
+    References are grouped by content type and each group is fetched with a
+    single in_bulk query, so the cost is one query per type rather than one
+    per reference. Unknown types or deleted objects resolve to None.
+    """
+    references = list(references)
+    ids_by_key = defaultdict(set)
+    for reference in references:
+        ids_by_key[reference.content_type].add(reference.object_id)
+
+    objects = {}
+    for key, ids in ids_by_key.items():
+        kind = KINDS_BY_KEY.get(key)
+        if kind is not None:
+            objects[key] = kind.model.objects.in_bulk(ids)
+
+    for reference in references:
+        reference.content_object = objects.get(reference.content_type, {}).get(reference.object_id)
+        kind = KINDS_BY_KEY.get(reference.content_type)
+        reference.content_url = kind.get_url(reference.object_id) if kind and reference.content_object else None
+    return references
@@ -0,0 +1,59 @@
+import random
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from django.apps import apps
+
+from .indexes import ContentIndex
+
+# Pool name -> (model label, filters, weight field or None)
+FEATURED_POOLS = {
+    'events': ('timeline.TimelineEvent', {'importance__gte': 4}, 'importance'),
+    'people': ('reference.Person', {}, None),
+    'deities': ('reference.Deity', {}, None),
+}
+
+
+def build_pools():
+    """Id arrays (and cumulative weights) for every featured pool"""
+    pools = {}
+    for name, (label, filters, weight_field) in FEATURED_POOLS.items():
+        queryset = apps.get_model(label).objects.filter(**filters).order_by()
+        if weight_field:
+            rows = list(queryset.values_list('pk', weight_field))
+            ids = array('q', (pk for pk, weight in rows))
+            cumulative = list(accumulate(max(weight or 0, 1) for pk, weight in rows))
+        else:
+            ids = array('q', queryset.values_list('pk', flat=True))
+            cumulative = None
+        pools[name] = (ids, cumulative)
+    return pools
+
+
+featured_pools = ContentIndex('featured', build_pools)
+
+
+def sample_ids(name, k):
+    """Pick k distinct ids from a pool, weighted when the pool has weights"""
+    ids, cumulative = featured_pools.get()[name]
+    if len(ids) <= k:
+        return list(ids)
+    if cumulative is None:
+        return random.sample(ids, k)
+    total = cumulative[-1]
+    picked = []
+    # Rejection sampling stays O(k log n) because k is tiny compared to the pool
+    while len(picked) < k:
+        pk = ids[bisect_right(cumulative, random.random() * total)]
+        if pk not in picked:
+            picked.append(pk)
+    return picked
+
+
+def sample_featured(name, k=3):
+    """Return k random objects from a featured pool with a single primary key lookup"""
+    label = FEATURED_POOLS[name][0]
+    ids = sample_ids(name, k)
+    objects = apps.get_model(label).objects.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
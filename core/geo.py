@@ -0,0 +1,111 @@
+import math
+
+# Geohash: interleaved longitude/latitude bits written in base 32, so nearby
+# points share a prefix and a prefix is a rectangular cell. Indexed string
+# range lookups on a geohash column therefore work as a spatial index.
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # Cells of roughly 5 x 5 metres
+MAX_COVER_CELLS = 32
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point, or '' when either coordinate is missing"""
+    if latitude is None or longitude is None:
+        return ''
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(latitude, longitude) size in degrees of a geohash cell"""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def precision_for_width(degrees):
+    """Shortest geohash precision whose cells are at most degrees wide"""
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        if cell_size(precision)[1] <= degrees:
+            return precision
+    return GEOHASH_PRECISION
+
+
+def _cover(south, west, north, east, precision):
+    lat_step, lng_step = cell_size(precision)
+    cells = set()
+    lat = math.floor((south + 90) / lat_step) * lat_step - 90
+    while lat <= north:
+        lng = math.floor((west + 180) / lng_step) * lng_step - 180
+        while lng <= east:
+            cells.add(encode_geohash(
+                min(lat + lat_step / 2, 90.0), min(lng + lng_step / 2, 180.0), precision))
+            lng += lng_step
+        lat += lat_step
+    return cells
+
+
+def cover_bbox(south, west, north, east, max_cells=MAX_COVER_CELLS):
+    """Sorted geohash prefixes whose cells together cover a bounding box
+
+    Uses the longest precision that needs at most max_cells cells. A box with
+    west > east crosses the antimeridian and is covered as two boxes.
+    """
+    boxes = [(south, west, north, east)]
+    if west > east:
+        boxes = [(south, west, north, 180.0), (south, -180.0, north, east)]
+    best = {''}
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lng_step = cell_size(precision)
+        estimate = sum(
+            (math.floor((n + 90) / lat_step) - math.floor((s + 90) / lat_step) + 1)
+            * (math.floor((e + 180) / lng_step) - math.floor((w + 180) / lng_step) + 1)
+            for s, w, n, e in boxes
+        )
+        if estimate > max_cells:
+            break
+        best = set().union(*[_cover(*box, precision) for box in boxes])
+    return sorted(best)
+
+
+MAX_TILE_LATITUDE = 85.0511287798  # Web Mercator cuts the map off here
+
+
+def tile_position(latitude, longitude, zoom):
+    """Fractional slippy map (x, y) tile coordinates of a point at a zoom level"""
+    latitude = max(-MAX_TILE_LATITUDE, min(MAX_TILE_LATITUDE, latitude))
+    tiles = 2 ** zoom
+    x = (longitude + 180.0) / 360.0 * tiles
+    radians = math.radians(latitude)
+    y = (1.0 - math.asinh(math.tan(radians)) / math.pi) / 2.0 * tiles
+    # The east edge and the south edge belong to the last tile
+    return min(x, tiles - 1e-9), min(y, tiles - 1e-9)
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_km(latitude, longitude, other_latitude, other_longitude):
+    """Great-circle (haversine) distance between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (latitude, longitude, other_latitude, other_longitude))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
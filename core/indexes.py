@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Token that changes whenever content is saved or deleted. It lives in the
+# database so every worker and management command sees the same value;
+# in-process indexes compare it on access and rebuild when it no longer matches.
+# Values are timestamps rather than a counter so a rolled back bump is never
+# reused for different content.
+CONTENT_VERSION_ID = 1
+
+_registry = []
+_current = None  # (read at, version, changed at) as last read by this process
+
+
+def _read_content_version():
+    from .models import ContentVersion
+
+    row = ContentVersion.objects.filter(pk=CONTENT_VERSION_ID).values_list('version', 'changed_at').first()
+    if row is None:
+        ContentVersion.objects.get_or_create(
+            pk=CONTENT_VERSION_ID, defaults={'version': time.time_ns(), 'changed_at': timezone.now()})
+        row = ContentVersion.objects.filter(pk=CONTENT_VERSION_ID).values_list('version', 'changed_at').first()
+    return row
+
+
+def _content_version_row():
+    """(version, changed at), re-read once the last read is CONTENT_VERSION_TTL seconds old"""
+    global _current
+    now = time.monotonic()
+    if _current is None or now - _current[0] >= settings.CONTENT_VERSION_TTL:
+        _current = (now, *_read_content_version())
+    return _current[1:]
+
+
+def content_version():
+    return _content_version_row()[0]
+
+
+def content_changed_at():
+    """When content last changed anywhere, for Last-Modified headers"""
+    return _content_version_row()[1]
+
+
+def bump_content_version():
+    global _current
+    from .models import ContentVersion
+
+    version, changed_at = time.time_ns(), timezone.now()
+    updated = ContentVersion.objects.filter(pk=CONTENT_VERSION_ID).update(version=version, changed_at=changed_at)
+    if not updated:
+        ContentVersion.objects.get_or_create(
+            pk=CONTENT_VERSION_ID, defaults={'version': version, 'changed_at': changed_at})
+    # This process sees its own change at once; others within CONTENT_VERSION_TTL
+    _current = None
+
+
+class ContentIndex:
+    """Process-local structure built from the content tables, rebuilt when content changes"""
+
+    def __init__(self, name, build):
+        self.name = name
+        self.build = build
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+        _registry.append(self)
+
+    def get(self):
+        version = content_version()
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._value = self.build()
+                    self._version = version
+        return self._value
+
+
+def warm_indexes():
+    """Build every registered index, e.g. when a worker starts"""
+    for index in _registry:
+        try:
+            index.get()
+        except DatabaseError:
+            logger.warning('Could not build %s index; tables may not be migrated yet', index.name)
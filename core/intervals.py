@@ -0,0 +1,51 @@
+from bisect import bisect_right
+
+
+class IntervalIndex:
+    """Static index answering "which intervals contain x" over closed [start, end] intervals
+
+    Intervals are kept sorted by start. The sorted array doubles as an
+    implicit balanced tree (each range's middle element is its root) where
+    every root stores the largest end in its range, so a query skips whole
+    ranges that finish before x and never looks past the last start <= x.
+    Cost is O(log n + k log n) for k matches.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [start for start, end, item in intervals]
+        self.ends = [end for start, end, item in intervals]
+        self.items = [item for start, end, item in intervals]
+        self.max_ends = list(self.ends)
+        self._augment(0, len(intervals))
+
+    def __len__(self):
+        return len(self.items)
+
+    def _augment(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        for child in (self._augment(lo, mid), self._augment(mid + 1, hi)):
+            if child is not None and child > self.max_ends[mid]:
+                self.max_ends[mid] = child
+        return self.max_ends[mid]
+
+    def stab(self, x):
+        """Items whose interval contains x, in start order"""
+        limit = bisect_right(self.starts, x)
+        found = []
+        stack = [(0, len(self.items))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi or lo >= limit:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_ends[mid] < x:
+                continue
+            stack.append((lo, mid))
+            if mid < limit:
+                if self.ends[mid] >= x:
+                    found.append(mid)
+                stack.append((mid + 1, hi))
+        return [self.items[index] for index in sorted(found)]
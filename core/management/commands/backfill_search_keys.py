@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.content import CONTENT_KINDS
+from core.indexes import bump_content_version
+
+
+class Command(BaseCommand):
+    help = 'Fills the normalized search key columns of every content model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for kind in CONTENT_KINDS:
+            model = kind.model
+            key_fields = kind.key_fields
+            # Only the columns the keys are built from, one batch in memory at a time
+            source_fields = list(model.search_key_fields.values())
+            batch = []
+            updated = 0
+            for obj in model.objects.only('pk', *source_fields).iterator(chunk_size=batch_size):
+                obj.update_search_keys()
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_update(batch, key_fields)
+                    updated += len(batch)
+                    batch = []
+            model.objects.bulk_update(batch, key_fields)
+            updated += len(batch)
+            self.stdout.write(f'Updated {updated} {model._meta.verbose_name_plural}')
+        transaction.on_commit(bump_content_version)
+        self.stdout.write(self.style.SUCCESS('Search keys backfilled'))
@@ -0,0 +1,243 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.models import Civilization
+from timeline.models import TimelineEvent
+from reference.models import Person, Deity, Government, Battle
+from quiz.models import Quiz, QuizAttempt
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Rollback(Exception):
+    """Raised to undo everything the benchmark wrote"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every view through the test client and compares against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', help='Only run views whose name contains this text')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Store these results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed relative p95 / query count growth over the baseline')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Serve repeat anonymous requests from the page cache')
+
+    def handle(self, *args, **options):
+        page_cache_timeout = settings.PAGE_CACHE_TIMEOUT if options['page_cache'] else 0
+        try:
+            # Everything the benchmark writes (user, attempts, submissions) is rolled back
+            with transaction.atomic(), override_settings(PAGE_CACHE_TIMEOUT=page_cache_timeout):
+                results = self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.report(results)
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {baseline_path}'))
+        elif baseline_path.exists():
+            self.compare(results, json.loads(baseline_path.read_text()), options['threshold'])
+        else:
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; run with --save-baseline'))
+
+    def run(self, options):
+        user, _ = User.objects.get_or_create(username='benchmark_user')
+        staff, _ = User.objects.update_or_create(username='benchmark_staff',
+                                                 defaults={'is_staff': True, 'is_superuser': True})
+        results = {}
+        for name, client, method, url, data in self.scenarios(user, staff):
+            if options['only'] and options['only'] not in name:
+                continue
+            if url is None:
+                self.stdout.write(self.style.WARNING(f'Skipping {name}: no data'))
+                continue
+            results[name] = self.measure(client, method, url, data, options['warmup'], options['iterations'])
+            results[name]['url'] = url
+        return results
+
+    def scenarios(self, user, staff):
+        """(name, client, method, url, data) for every URL in SagaAHA/urls.py"""
+        anonymous = Client(SERVER_NAME='localhost', raise_request_exception=False)
+        member = Client(SERVER_NAME='localhost', raise_request_exception=False)
+        member.force_login(user)
+        # Admin pages and request stats are staff only
+        admin = Client(SERVER_NAME='localhost', raise_request_exception=False)
+        admin.force_login(staff)
+
+        def url_for(view_name, model=None, **filters):
+            if model is None:
+                return reverse(view_name)
+            pk = model.objects.filter(**filters).order_by('pk').values_list('pk', flat=True).first()
+            return reverse(view_name, args=[pk]) if pk is not None else None
+
+        event_url = url_for('timeline:event_detail', TimelineEvent)
+        civilization_neighbours_url = url_for('timeline:event_neighbours', TimelineEvent, civilization__isnull=False)
+        quiz = Quiz.objects.filter(is_published=True).order_by('pk').first()
+        attempt = None
+        if quiz is not None:
+            attempt = QuizAttempt.objects.create(user=user, quiz=quiz, max_score=1, completed=True)
+        civilization = Civilization.objects.order_by('pk').first()
+        answers = {}
+        if quiz is not None:
+            answers = {str(question.pk): question.correct_answer for question in quiz.questions.all()[:10]}
+
+        get = 'get'
+        scenarios = [
+            ('admin:index', admin, get, reverse('admin:index'), None),
+            ('admin:timeline_timelineevent_changelist', admin, get,
+             reverse('admin:timeline_timelineevent_changelist'), None),
+            ('admin:timeline_timelineevent_change', admin, get,
+             url_for('admin:timeline_timelineevent_change', TimelineEvent), None),
+            ('core:home', anonymous, get, reverse('core:home'), None),
+            ('core:home (member)', member, get, reverse('core:home'), None),
+            ('core:about', anonymous, get, reverse('core:about'), None),
+            ('core:profile', member, get, reverse('core:profile'), None),
+            ('core:search', anonymous, get, reverse('core:search') + '?q=ar', None),
+            ('core:autocomplete', anonymous, get, reverse('core:autocomplete') + '?q=ar', None),
+            ('core:world', anonymous, get, reverse('core:world') + '?year=-450', None),
+            ('core:request_stats', admin, get, reverse('core:request_stats'), None),
+            ('timeline:timeline', anonymous, get, reverse('timeline:timeline'), None),
+            ('timeline:event_detail', anonymous, get, event_url, None),
+            ('timeline:event_neighbours', anonymous, get, url_for('timeline:event_neighbours', TimelineEvent), None),
+            ('timeline:event_neighbours (civilization)', anonymous, get,
+             civilization_neighbours_url + '?scope=civilization&n=50' if civilization_neighbours_url else None, None),
+            ('timeline:event_causes', anonymous, get, url_for('timeline:event_causes', TimelineEvent), None),
+            ('timeline:event_effects', anonymous, get, url_for('timeline:event_effects', TimelineEvent), None),
+            ('timeline:causal_path', anonymous, get, reverse('timeline:causal_path') + '?from=1&to=2', None),
+            ('timeline:filter_events', anonymous, get, reverse('timeline:filter_events'), None),
+            ('timeline:filter_events (filtered)', anonymous, get,
+             reverse('timeline:filter_events') + '?importance=3&start_year=-500&end_year=500', None),
+            ('timeline:event_histogram', anonymous, get, reverse('timeline:event_histogram'), None),
+            ('timeline:event_histogram (decades)', anonymous, get,
+             reverse('timeline:event_histogram') + '?resolution=decade&start_year=-500&end_year=500', None),
+            ('timeline:event_map', anonymous, get, reverse('timeline:event_map'), None),
+            ('timeline:event_map (zoomed)', anonymous, get,
+             reverse('timeline:event_map') + '?bbox=30,10,45,30&zoom=6&category=military', None),
+            ('reference:reference_home', anonymous, get, reverse('reference:reference_home'), None),
+            ('reference:people_list', anonymous, get, reverse('reference:people_list'), None),
+            ('reference:person_detail', anonymous, get, url_for('reference:person_detail', Person), None),
+            ('reference:people_by_category', anonymous, get,
+             reverse('reference:people_by_category', args=['ruler']), None),
+            ('reference:deities_list', anonymous, get, reverse('reference:deities_list'), None),
+            ('reference:deity_detail', anonymous, get, url_for('reference:deity_detail', Deity), None),
+            ('reference:deities_by_civilization', anonymous, get,
+             reverse('reference:deities_by_civilization', args=[civilization.pk]) if civilization else None, None),
+            ('reference:governments_list', anonymous, get, reverse('reference:governments_list'), None),
+            ('reference:government_detail', anonymous, get,
+             url_for('reference:government_detail', Government), None),
+            ('reference:military_home', anonymous, get, reverse('reference:military_home'), None),
+            ('reference:military_units', anonymous, get, reverse('reference:military_units'), None),
+            ('reference:military_weapons', anonymous, get, reverse('reference:military_weapons'), None),
+            ('reference:battles_list', anonymous, get, reverse('reference:battles_list'), None),
+            ('reference:battle_detail', anonymous, get, url_for('reference:battle_detail', Battle), None),
+            ('reference:culture_home', anonymous, get, reverse('reference:culture_home'), None),
+            ('reference:daily_life', anonymous, get, reverse('reference:daily_life'), None),
+            ('reference:social_classes', anonymous, get, reverse('reference:social_classes'), None),
+            ('reference:trade', anonymous, get, reverse('reference:trade'), None),
+            ('reference:art', anonymous, get, reverse('reference:art'), None),
+            ('reference:literature', anonymous, get, reverse('reference:literature'), None),
+            ('quiz:quiz_home', anonymous, get, reverse('quiz:quiz_home'), None),
+            ('quiz:random_history_quiz', anonymous, get, reverse('quiz:random_history_quiz'), None),
+            ('quiz:quiz_by_period', anonymous, get, reverse('quiz:quiz_by_period'), None),
+            ('quiz:quiz_by_topic', anonymous, get, reverse('quiz:quiz_by_topic'), None),
+            ('quiz:comprehensive_quiz', anonymous, get, reverse('quiz:comprehensive_quiz'), None),
+            ('quiz:custom_quiz', member, get, reverse('quiz:custom_quiz'), None),
+            ('quiz:take_quiz', member, get, reverse('quiz:take_quiz', args=[quiz.pk]) if quiz else None, None),
+            ('quiz:take_quiz (submit)', member, 'post',
+             reverse('quiz:take_quiz', args=[quiz.pk]) if quiz else None, {'answers': answers}),
+            ('quiz:quiz_result', member, get,
+             reverse('quiz:quiz_result', args=[attempt.pk]) if attempt else None, None),
+            ('quiz:progress', member, get, reverse('quiz:progress'), None),
+            ('quiz:attempt_history', member, get, reverse('quiz:attempt_history'), None),
+            ('quiz:leaderboard', anonymous, get, reverse('quiz:leaderboard'), None),
+        ]
+        for slug in ['grikkland', 'rom', 'midaldir']:
+            scenarios.extend([
+                (f'periods:period_home ({slug})', anonymous, get, reverse('periods:period_home', args=[slug]), None),
+                (f'periods:period_timeline ({slug})', anonymous, get,
+                 reverse('periods:period_timeline', args=[slug]), None),
+                (f'periods:period_people ({slug})', anonymous, get,
+                 reverse('periods:period_people', args=[slug]), None),
+                (f'periods:period_culture ({slug})', anonymous, get,
+                 reverse('periods:period_culture', args=[slug]), None),
+                (f'periods:period_quiz ({slug})', anonymous, get, reverse('periods:period_quiz', args=[slug]), None),
+            ])
+        return scenarios
+
+    def request(self, client, method, url, data):
+        # Each request runs in a savepoint so submissions do not pile up between iterations
+        try:
+            with transaction.atomic():
+                if method == 'post':
+                    response = client.post(url, json.dumps(data), content_type='application/json')
+                else:
+                    response = client.get(url)
+                raise Rollback(response)
+        except Rollback as rollback:
+            return rollback.args[0]
+
+    def measure(self, client, method, url, data, warmup, iterations):
+        for _ in range(warmup):
+            self.request(client, method, url, data)
+        timings = []
+        queries = []
+        status = None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = self.request(client, method, url, data)
+                timings.append((time.perf_counter() - start) * 1000)
+            # Savepoint statements are benchmark overhead, not view queries
+            queries.append(sum(1 for query in captured.captured_queries if 'SAVEPOINT' not in query['sql']))
+            status = response.status_code
+        if len(timings) > 1:
+            p95 = statistics.quantiles(timings, n=20)[18]
+        else:
+            p95 = timings[0]
+        return {
+            'status': status,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(p95, 2),
+            'queries': max(queries),
+        }
+
+    def report(self, results):
+        self.stdout.write(f'{"view":<45} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8}')
+        for name, result in results.items():
+            line = f'{name:<45} {result["status"]:>6} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["queries"]:>8}'
+            self.stdout.write(self.style.ERROR(line) if result['status'] >= 500 else line)
+
+    def compare(self, results, baseline, threshold):
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if result['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+                regressions.append(f'{name}: p95 {previous["p95_ms"]:.2f} ms -> {result["p95_ms"]:.2f} ms')
+            if result['queries'] > previous['queries'] * (1 + threshold):
+                regressions.append(f'{name}: queries {previous["queries"]} -> {result["queries"]}')
+            if result['status'] != previous['status']:
+                regressions.append(f'{name}: status {previous["status"]} -> {result["status"]}')
+        if regressions:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,381 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.indexes import bump_content_version
+from core.models import HistoricalPeriod, Civilization
+from timeline.models import TimelineEvent, TimelineRelation
+from reference.models import Person, Deity, Battle
+from quiz.models import Quiz, Question, QuizAttempt, QuestionResponse
+
+SYLLABLES = [
+    'ar', 'is', 'to', 'kle', 'os', 'ma', 'ri', 'us', 'the', 'ne', 'dor', 'al', 'ka', 'sa',
+    'lon', 'per', 'þór', 'ðis', 'æg', 'ís', 'ól', 'ún', 'hild', 'geir', 'vald', 'mund',
+]
+
+REGIONS = [
+    ('Greece', 38.0, 23.7), ('Italy', 41.9, 12.5), ('Egypt', 30.0, 31.2), ('Mesopotamia', 33.3, 44.4),
+    ('Persia', 29.9, 52.9), ('Gaul', 46.6, 2.4), ('Iberia', 40.4, -3.7), ('Scandinavia', 59.9, 10.7),
+    ('Anatolia', 39.9, 32.8), ('Levant', 33.9, 35.5), ('Britain', 51.5, -0.1), ('Iceland', 64.1, -21.9),
+]
+
+# Heavier weight on low importance, as in the curated content
+IMPORTANCE_WEIGHTS = [40, 25, 20, 10, 5]
+EVENT_CATEGORY_WEIGHTS = [25, 25, 15, 12, 8, 10, 5]
+PERSON_CATEGORY_WEIGHTS = [20, 20, 15, 15, 10, 8, 7, 5]
+# Attempts are spread over this much history, each lasting up to ATTEMPT_MAX_SECONDS
+ATTEMPT_HISTORY = timedelta(days=365)
+ATTEMPT_MAX_SECONDS = 900
+
+
+class Command(BaseCommand):
+    help = 'Bulk-creates synthetic content, users and quiz history for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier applied to every volume below')
+        parser.add_argument('--periods', type=int, default=12)
+        parser.add_argument('--civilizations', type=int, default=60)
+        parser.add_argument('--events', type=int, default=100000)
+        parser.add_argument('--relations', type=int, default=20000)
+        parser.add_argument('--people', type=int, default=50000)
+        parser.add_argument('--deities', type=int, default=2000)
+        parser.add_argument('--battles', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--quizzes', type=int, default=50)
+        parser.add_argument('--questions-per-quiz', type=int, default=20)
+        parser.add_argument('--responses', type=int, default=5000000)
+        parser.add_argument('--responses-per-attempt', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.tag = uuid.uuid4().hex[:6]
+        scale = options['scale']
+
+        def volume(name):
+            return max(int(options[name] * scale), 1)
+
+        periods = self.create_periods(volume('periods'))
+        civilizations = self.create_civilizations(volume('civilizations'), periods)
+        event_ids = self.create_events(volume('events'), civilizations)
+        self.create_relations(volume('relations'), event_ids)
+        person_ids = self.create_people(volume('people'), civilizations)
+        self.create_deities(volume('deities'), civilizations)
+        self.create_battles(volume('battles'), civilizations, person_ids)
+        user_ids = self.create_users(volume('users'))
+        questions = self.create_quizzes(volume('quizzes'), options['questions_per_quiz'], periods)
+        self.create_attempts(volume('responses'), options['responses_per_attempt'], user_ids, questions)
+
+        self.stdout.write('Rebuilding derived data...')
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_quiz_progress', stdout=self.stdout)
+        call_command('rebuild_event_histogram', stdout=self.stdout)
+        call_command('rebuild_causal_closure', stdout=self.stdout)
+        call_command('derive_concurrent_events', stdout=self.stdout)
+        call_command('rebuild_contemporaries', stdout=self.stdout)
+        bump_content_version()
+        self.stdout.write(self.style.SUCCESS('Synthetic data generated'))
+
+    # Helpers
+
+    def name(self, words=2):
+        parts = []
+        for _ in range(words):
+            word = ''.join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(2, 4)))
+            parts.append(word.capitalize())
+        return ' '.join(parts)
+
+    def bulk_create(self, model, objects, keep=None):
+        """Insert objects in batches, dropping each batch once saved
+
+        Returns [keep(obj)] for every created object (e.g. its primary key),
+        or only the count when keep is None, so memory stays flat however
+        many rows are generated.
+        """
+        kept = []
+        count = 0
+        batch = []
+        for obj in objects:
+            if hasattr(obj, 'update_search_keys'):
+                obj.update_search_keys()
+            if hasattr(obj, 'update_derived_fields'):
+                obj.update_derived_fields()
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                count += self._insert(model, batch, keep, kept)
+                batch = []
+        if batch:
+            count += self._insert(model, batch, keep, kept)
+        self.stdout.write(f'Created {count} {model._meta.verbose_name_plural}')
+        return kept if keep is not None else count
+
+    @transaction.atomic
+    def _insert(self, model, batch, keep, kept):
+        created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+        if keep is not None:
+            kept.extend(keep(obj) for obj in created)
+        return len(created)
+
+    # Content
+
+    def create_periods(self, count):
+        periods = []
+        start = -3000
+        length = 4500 // count
+        for i in range(count):
+            name = self.name(1)
+            periods.append(HistoricalPeriod(
+                name=f'{name} Period {self.tag}',
+                name_is=f'{name}-tímabil {self.tag}',
+                start_year=start + i * length,
+                end_year=start + (i + 1) * length,
+                description=f'Synthetic period {i}',
+                description_is=f'Gervitímabil {i}',
+            ))
+        return self.bulk_create(HistoricalPeriod, periods, keep=lambda period: period)
+
+    def create_civilizations(self, count, periods):
+        civilizations = []
+        for _ in range(count):
+            period = self.random.choice(periods)
+            region = self.random.choice(REGIONS)
+            start = self.random.randint(period.start_year, period.end_year)
+            name = self.name(1)
+            civilizations.append(Civilization(
+                name=f'{name} {self.tag}',
+                name_is=f'{name}ar {self.tag}',
+                start_year=start,
+                end_year=start + self.random.randint(100, 1200),
+                region=region[0],
+                description=f'Synthetic civilization in {region[0]}',
+                description_is=f'Gervisiðmenning á svæðinu {region[0]}',
+                period=period,
+            ))
+        return self.bulk_create(Civilization, civilizations, keep=lambda civilization: civilization)
+
+    def create_events(self, count, civilizations):
+        categories = [key for key, label in TimelineEvent.EVENT_CATEGORIES]
+        regions = {name: (lat, lng) for name, lat, lng in REGIONS}
+
+        def events():
+            for i in range(count):
+                # About one event in ten is not tied to a civilization
+                civilization = self.random.choice(civilizations) if self.random.random() > 0.1 else None
+                source = civilization or self.random.choice(civilizations)
+                start = self.random.randint(source.start_year, source.end_year)
+                # Most events are single-year; some span years to decades, a few centuries
+                end = None
+                if self.random.random() < 0.3:
+                    end = start + int(self.random.lognormvariate(2.5, 1.2)) + 1
+                lat, lng = regions[source.region]
+                located = self.random.random() < 0.7
+                title = self.name(self.random.randint(1, 3))
+                yield TimelineEvent(
+                    title=f'{title} {i}',
+                    title_is=f'{title} {i}',
+                    description=f'Synthetic event {i}. ' * 20,
+                    description_is=f'Gerviatburður {i}. ' * 20,
+                    date_start=start,
+                    date_end=end,
+                    period=source.period,
+                    civilization=civilization,
+                    region=source.region,
+                    category=self.random.choices(categories, EVENT_CATEGORY_WEIGHTS)[0],
+                    importance=self.random.choices(range(1, 6), IMPORTANCE_WEIGHTS)[0],
+                    latitude=lat + self.random.gauss(0, 3) if located else None,
+                    longitude=lng + self.random.gauss(0, 3) if located else None,
+                )
+
+        return self.bulk_create(TimelineEvent, events(), keep=lambda event: event.pk)
+
+    def create_relations(self, count, event_ids):
+        relation_types = [key for key, label in TimelineRelation.RELATION_TYPES]
+        seen = set()
+        if len(event_ids) < 2:
+            # A relation needs two distinct events
+            count = 0
+
+        def relations():
+            for _ in range(count):
+                from_id, to_id = self.random.sample(event_ids, 2)
+                relation_type = self.random.choice(relation_types)
+                if (from_id, to_id, relation_type) in seen:
+                    continue
+                seen.add((from_id, to_id, relation_type))
+                yield TimelineRelation(from_event_id=from_id, to_event_id=to_id, relation_type=relation_type)
+
+        self.bulk_create(TimelineRelation, relations())
+
+    def create_people(self, count, civilizations):
+        categories = [key for key, label in Person.PERSON_CATEGORIES]
+
+        def people():
+            for i in range(count):
+                civilization = self.random.choice(civilizations)
+                birth = self.random.randint(civilization.start_year, civilization.end_year)
+                name = self.name(self.random.randint(1, 3))
+                yield Person(
+                    name=name,
+                    name_is=name,
+                    birth_date=birth,
+                    death_date=birth + self.random.randint(20, 90),
+                    category=self.random.choices(categories, PERSON_CATEGORY_WEIGHTS)[0],
+                    civilization=civilization,
+                    period=civilization.period,
+                    biography=f'Synthetic biography {i}. ' * 30,
+                    biography_is=f'Gerviævisaga {i}. ' * 30,
+                )
+
+        return self.bulk_create(Person, people(), keep=lambda person: person.pk)
+
+    def create_deities(self, count, civilizations):
+        def deities():
+            for i in range(count):
+                name = self.name(1)
+                yield Deity(
+                    name=name,
+                    name_is=name,
+                    civilization=self.random.choice(civilizations),
+                    domain='Synthetic domain',
+                    domain_is='Gerviumdæmi',
+                    mythology=f'Synthetic mythology {i}',
+                    mythology_is=f'Gervigoðafræði {i}',
+                    cultural_significance='Synthetic',
+                    cultural_significance_is='Gervi',
+                )
+
+        self.bulk_create(Deity, deities())
+
+    def create_battles(self, count, civilizations, person_ids):
+        def battles():
+            for i in range(count):
+                civilization = self.random.choice(civilizations)
+                name = self.name(1)
+                yield Battle(
+                    name=f'Battle of {name}',
+                    name_is=f'Orrusta við {name}',
+                    date=self.random.randint(civilization.start_year, civilization.end_year),
+                    location=civilization.region,
+                    period=civilization.period,
+                    description=f'Synthetic battle {i}',
+                    description_is=f'Gervi-orrusta {i}',
+                    outcome='Synthetic',
+                    outcome_is='Gervi',
+                    significance='Synthetic',
+                    significance_is='Gervi',
+                )
+
+        battle_ids = self.bulk_create(Battle, battles(), keep=lambda battle: battle.pk)
+        self.bulk_create(Battle.participants.through, (
+            Battle.participants.through(battle_id=battle_id, civilization_id=civilization.pk)
+            for battle_id in battle_ids
+            for civilization in self.random.sample(civilizations, min(2, len(civilizations)))
+        ))
+        self.bulk_create(Battle.commanders.through, (
+            Battle.commanders.through(battle_id=battle_id, person_id=person_id)
+            for battle_id in battle_ids
+            for person_id in self.random.sample(person_ids, min(2, len(person_ids)))
+        ))
+
+    # Users and quiz history
+
+    def create_users(self, count):
+        users = (
+            User(username=f'synthetic_{self.tag}_{i}', password='!', email=f'synthetic_{self.tag}_{i}@example.com')
+            for i in range(count)
+        )
+        return self.bulk_create(User, users, keep=lambda user: user.pk)
+
+    def create_quizzes(self, count, questions_per_quiz, periods):
+        quizzes = self.bulk_create(Quiz, (
+            Quiz(
+                title=f'Synthetic quiz {i} {self.tag}',
+                title_is=f'Gervipróf {i} {self.tag}',
+                description='Synthetic quiz',
+                description_is='Gervipróf',
+                quiz_type='period',
+                period=self.random.choice(periods),
+                difficulty=self.random.randint(1, 5),
+                is_published=True,
+            )
+            for i in range(count)
+        ), keep=lambda quiz: quiz)
+        questions = self.bulk_create(Question, (
+            Question(
+                quiz=quiz,
+                question_text=f'Synthetic question {i}?',
+                question_text_is=f'Gervispurning {i}?',
+                question_type='multiple_choice',
+                options='["A", "B", "C", "D"]',
+                correct_answer=str(self.random.randint(0, 3)),
+                difficulty=self.random.randint(1, 5),
+            )
+            for quiz in quizzes
+            for i in range(questions_per_quiz)
+        ), keep=lambda question: question)
+        questions_by_quiz = {}
+        for question in questions:
+            questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+        return questions_by_quiz
+
+    def create_attempts(self, response_count, per_attempt, user_ids, questions_by_quiz):
+        """Create attempts chunk by chunk so memory stays flat at millions of responses"""
+        attempt_count = max(response_count // per_attempt, 1)
+        quiz_ids = list(questions_by_quiz)
+        # A skill level per user makes leaderboard percentages realistic
+        skill = {user_id: self.random.betavariate(4, 3) for user_id in user_ids}
+        created_attempts = 0
+        created_responses = 0
+        now = timezone.now()
+        history_seconds = ATTEMPT_HISTORY.total_seconds()
+
+        while created_attempts < attempt_count:
+            chunk = min(self.batch_size, attempt_count - created_attempts)
+            attempts = []
+            answers = []
+            for _ in range(chunk):
+                user_id = self.random.choice(user_ids)
+                quiz_id = self.random.choice(quiz_ids)
+                asked = self.random.sample(questions_by_quiz[quiz_id], min(per_attempt, len(questions_by_quiz[quiz_id])))
+                correct = [self.random.random() < skill[user_id] for _ in asked]
+                attempts.append(QuizAttempt(
+                    user_id=user_id,
+                    quiz_id=quiz_id,
+                    score=sum(correct),
+                    max_score=len(asked),
+                    completed=self.random.random() < 0.95,
+                ))
+                answers.append(list(zip(asked, correct)))
+
+            with transaction.atomic():
+                QuizAttempt.objects.bulk_create(attempts, batch_size=self.batch_size)
+                # start_time is auto_now_add, so the spread is applied after the insert
+                for attempt in attempts:
+                    attempt.start_time = now - timedelta(seconds=self.random.uniform(0, history_seconds))
+                    attempt.end_time = attempt.start_time + timedelta(seconds=self.random.randint(30, ATTEMPT_MAX_SECONDS))
+                QuizAttempt.objects.bulk_update(attempts, ['start_time', 'end_time'], batch_size=self.batch_size)
+                responses = [
+                    QuestionResponse(
+                        attempt_id=attempt.pk,
+                        question_id=question.pk,
+                        user_answer=question.correct_answer if is_correct else '-1',
+                        is_correct=is_correct,
+                        points_earned=int(is_correct),
+                    )
+                    for attempt, attempt_answers in zip(attempts, answers)
+                    for question, is_correct in attempt_answers
+                ]
+                QuestionResponse.objects.bulk_create(responses, batch_size=self.batch_size)
+
+            created_attempts += chunk
+            created_responses += len(responses)
+            self.stdout.write(f'Created {created_attempts}/{attempt_count} attempts, {created_responses} responses')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from all content models'
+
+    def handle(self, *args, **kwargs):
+        if not search.index_available():
+            self.stdout.write(self.style.WARNING('Full-text search index requires SQLite; skipping'))
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} objects'))
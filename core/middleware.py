@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestStats:
+    """Aggregated per-view request metrics for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, queries, db_time, render_time, size):
+        with self._lock:
+            stats = self._views.setdefault(view_name, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_time': 0.0,
+                'render_time': 0.0,
+                'max_render_time': 0.0,
+                'bytes': 0,
+            })
+            stats['requests'] += 1
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+            stats['db_time'] += db_time
+            stats['render_time'] += render_time
+            stats['max_render_time'] = max(stats['max_render_time'], render_time)
+            stats['bytes'] += size
+
+    def summary(self):
+        """Per-view averages and maxima, times in milliseconds"""
+        with self._lock:
+            views = {name: dict(stats) for name, stats in self._views.items()}
+        summary = {}
+        for name, stats in sorted(views.items()):
+            requests = stats['requests']
+            summary[name] = {
+                'requests': requests,
+                'avg_queries': stats['queries'] / requests,
+                'max_queries': stats['max_queries'],
+                'avg_db_ms': stats['db_time'] / requests * 1000,
+                'avg_render_ms': stats['render_time'] / requests * 1000,
+                'max_render_ms': stats['max_render_time'] * 1000,
+                'avg_bytes': stats['bytes'] / requests,
+            }
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+request_stats = RequestStats()
+
+
+def query_budget(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET', 30))
+
+
+class QueryInstrumentationMiddleware:
+    """Measures SQL queries, DB time, render time and response size per view
+
+    Metrics are aggregated in request_stats (served by core:request_stats),
+    sent as X- headers when DEBUG is on, and a warning is logged whenever a
+    view runs more queries than its budget (QUERY_BUDGET / QUERY_BUDGETS).
+    Render time is the time spent in the view outside the database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        render_time = time.perf_counter() - start - timer.duration
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        size = 0 if response.streaming else len(response.content)
+        request_stats.record(view_name, timer.count, timer.duration, render_time, size)
+
+        budget = query_budget(view_name)
+        if timer.count > budget:
+            logger.warning('%s ran %d queries (budget %d) for %s',
+                           view_name, timer.count, budget, request.path)
+
+        if settings.DEBUG:
+            response['X-View-Name'] = view_name
+            response['X-Query-Count'] = str(timer.count)
+            response['X-DB-Time-ms'] = f'{timer.duration * 1000:.1f}'
+            response['X-Render-Time-ms'] = f'{render_time * 1000:.1f}'
+            response['X-Response-Size'] = str(size)
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='civilization',
+            name='name_is_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='civilization',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='historicalperiod',
+            name='name_is_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='historicalperiod',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_search_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernote',
+            index=models.Index(fields=['user', 'content_type'], name='core_note_user_type_idx'),
+        ),
+    ]
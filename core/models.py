@@ -1,5 +1,25 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .text import normalize_key
+
+class SearchKeyMixin:
+    """Keeps normalized search key columns in sync with their source fields"""
+    search_key_fields = {}  # key field -> source field
+
+    def update_search_keys(self):
+        for key_field, source_field in self.search_key_fields.items():
+            setattr(self, key_field, normalize_key(getattr(self, source_field)))
+
+    def save(self, *args, **kwargs):
+        self.update_search_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for key_field, source_field in self.search_key_fields.items():
+                if source_field in update_fields:
+                    update_fields.add(key_field)
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
 
 class UserProfile(models.Model):
     """Extended user profile for tracking progress and preferences"""
@@ -14,10 +34,14 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s profile"
 
-class HistoricalPeriod(models.Model):
+class HistoricalPeriod(SearchKeyMixin, models.Model):
     """Main historical periods for categorization"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     start_year = models.IntegerField()  # Can be negative for BCE
     end_year = models.IntegerField()
     description = models.TextField()
@@ -27,10 +51,14 @@ class HistoricalPeriod(models.Model):
     def __str__(self):
         return self.name_is
 
-class Civilization(models.Model):
+class Civilization(SearchKeyMixin, models.Model):
     """Major civilizations throughout history"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     start_year = models.IntegerField()  # Can be negative for BCE
     end_year = models.IntegerField()
     region = models.CharField(max_length=100)
@@ -44,11 +72,12 @@ class Civilization(models.Model):
 class Favorite(models.Model):
     """User favorites for any content type"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
-    content_type = models.CharField(max_length=50)  # e.g., 'person', 'event', 'deity'
+    content_type = models.CharField(max_length=50)  # A core.content.CONTENT_KINDS key, e.g. 'person', 'event', 'deity'
     object_id = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # The unique index also serves (user, content_type) lookups by prefix
         unique_together = ('user', 'content_type', 'object_id')
 
     def __str__(self):
@@ -65,3 +94,16 @@ class UserNote(models.Model):
 
     def __str__(self):
         return f"{self.user.username}'s note on {self.content_type} ({self.object_id})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'content_type'], name='core_note_user_type_idx'),
+        ]
+
+class ContentVersion(models.Model):
+    """Single row counting content changes, shared by every worker process (see core.indexes)"""
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Content version {self.version}"
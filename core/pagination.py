@@ -0,0 +1,89 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+# Values a cursor may hold; anything else (lists, objects) would reach the ORM filter
+CURSOR_VALUE_TYPES = (int, float, str, type(None))
+
+
+def decode_cursor(cursor, length=None):
+    """Decode a cursor made by encode_cursor; raises ValueError when it is malformed
+
+    A valid cursor is a list of length scalar values (when length is given).
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (ValueError, TypeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if not isinstance(values, list) or (length is not None and len(values) != length):
+        raise ValueError('Invalid cursor')
+    if any(isinstance(value, bool) or not isinstance(value, CURSOR_VALUE_TYPES) for value in values):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def _after(fields, values, descending):
+    """Rows strictly after values in (fields) order, e.g. a > x OR (a = x AND b > y)"""
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for position, field in enumerate(fields):
+        term = Q(**{f'{field}__{lookup}': values[position]})
+        for previous, value in zip(fields[:position], values):
+            term &= Q(**{previous: value})
+        condition |= term
+    return condition
+
+
+def _row_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def row_cursor(row, fields):
+    """Cursor pointing just after row"""
+    return encode_cursor([_row_value(row, field) for field in fields])
+
+
+def keyset_queryset(queryset, fields, cursor=None, descending=False):
+    """Order queryset by fields and keep only the rows after cursor"""
+    queryset = queryset.order_by(*[f'-{field}' if descending else field for field in fields])
+    if cursor:
+        values = decode_cursor(cursor, len(fields))
+        queryset = queryset.filter(_after(fields, values, descending))
+    return queryset
+
+
+def keyset_page(queryset, fields, cursor=None, limit=20, descending=False):
+    """Return (rows, next_cursor) for the page after cursor, ordered by fields
+
+    The last field must be unique (normally the primary key) so pages never
+    overlap. Cost is one indexed range scan regardless of how deep the page is.
+    """
+    queryset = keyset_queryset(queryset, fields, cursor, descending)
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = row_cursor(rows[-1], fields)
+    return rows, next_cursor
+
+
+def keyset_neighbours(queryset, fields, row, limit=1):
+    """Return (previous, next) lists of up to limit rows on each side of row in fields order, nearest first
+
+    Each side is one indexed range scan starting at row's key, so it costs
+    the same wherever row sits in the ordering.
+    """
+    values = [_row_value(row, field) for field in fields]
+    previous = queryset.filter(_after(fields, values, True)).order_by(*[f'-{field}' for field in fields])
+    following = queryset.filter(_after(fields, values, False)).order_by(*fields)
+    return list(previous[:limit]), list(following[:limit])
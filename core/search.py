@@ -0,0 +1,160 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .content import CONTENT_KINDS, KINDS_BY_CODE, kind_for_model
+from .text import normalize_key, prefix_range
+
+# SQLite FTS5 table holding one row per content object. The rowid encodes the
+# content kind and object id so rows can be replaced without scanning the index.
+# Text is stored folded by normalize_key so 'Thor' finds 'Þór'.
+INDEX_TABLE = 'core_search_index'
+ROWID_SHIFT = 2 ** 40
+
+# bm25 column weights: title, title_is, body, body_is
+COLUMN_WEIGHTS = (10.0, 10.0, 1.0, 1.0)
+
+
+def index_available():
+    return connection.vendor == 'sqlite'
+
+
+def make_rowid(kind, object_id):
+    return kind.code * ROWID_SHIFT + object_id
+
+
+def split_rowid(rowid):
+    return KINDS_BY_CODE.get(rowid // ROWID_SHIFT), rowid % ROWID_SHIFT
+
+
+def _document(kind, obj):
+    """Build the (title, title_is, body, body_is) columns for an object"""
+    title_field, title_is_field = kind.title_fields
+    body = []
+    body_is = []
+    for field, field_is in kind.body_fields:
+        body.append(normalize_key(getattr(obj, field)))
+        if field_is:
+            body_is.append(normalize_key(getattr(obj, field_is)))
+    return (
+        normalize_key(getattr(obj, title_field)),
+        normalize_key(getattr(obj, title_is_field)),
+        '\n'.join(body),
+        '\n'.join(body_is),
+    )
+
+
+def index_object(obj):
+    """Add or replace the index row for a content object"""
+    kind = kind_for_model(type(obj))
+    if kind is None or not index_available():
+        return
+    rowid = make_rowid(kind, obj.pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {INDEX_TABLE} (rowid, title, title_is, body, body_is) VALUES (%s, %s, %s, %s, %s)',
+            [rowid, *_document(kind, obj)],
+        )
+
+
+def remove_object(obj):
+    """Remove the index row for a content object"""
+    kind = kind_for_model(type(obj))
+    if kind is None or not index_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [make_rowid(kind, obj.pk)])
+
+
+@transaction.atomic
+def rebuild_index():
+    """Rebuild the whole search index from the content tables"""
+    if not index_available():
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+        for kind in CONTENT_KINDS:
+            rows = [
+                [make_rowid(kind, obj.pk), *_document(kind, obj)]
+                for obj in kind.model.objects.all().iterator()
+            ]
+            cursor.executemany(
+                f'INSERT INTO {INDEX_TABLE} (rowid, title, title_is, body, body_is) VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+            count += len(rows)
+    return count
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query where every word is a prefix term"""
+    words = re.findall(r'\w+', normalize_key(query))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def ranked_matches(query, per_kind=10):
+    """Return (kind, object_id) pairs for the best per_kind matches of every kind, best first
+
+    Ranking and the limit are applied per kind (the kind code is the high
+    part of the rowid), so a kind with many matches cannot crowd out others.
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM ('
+            f'SELECT rowid, score, ROW_NUMBER() OVER (PARTITION BY rowid / {ROWID_SHIFT} ORDER BY score) AS kind_rank '
+            f'FROM (SELECT rowid, bm25({INDEX_TABLE}, {weights}) AS score FROM {INDEX_TABLE} '
+            f'WHERE {INDEX_TABLE} MATCH %s)'
+            f') WHERE kind_rank <= %s ORDER BY score',
+            [match, per_kind],
+        )
+        return [split_rowid(rowid) for (rowid,) in cursor.fetchall()]
+
+
+def key_matches(query, per_kind):
+    """Indexed prefix lookups on the normalized name/title keys, exact matches first"""
+    key = normalize_key(query)
+    if not key:
+        return []
+    matches = []
+    for kind in CONTENT_KINDS:
+        exact = Q()
+        prefix = Q()
+        for field in kind.key_fields:
+            exact |= Q(**{field: key})
+            prefix |= Q(**prefix_range(field, key))
+        # Exact matches are fetched on their own so the per_kind slice can never drop them
+        ids = list(kind.model.objects.filter(exact).values_list('pk', flat=True)[:per_kind])
+        if len(ids) < per_kind:
+            ids += kind.model.objects.filter(prefix).exclude(pk__in=ids).values_list(
+                'pk', flat=True)[:per_kind - len(ids)]
+        matches.extend((kind, object_id) for object_id in ids)
+    return matches
+
+
+def search(query, per_kind=10):
+    """Search every content model, returning ranked objects grouped by results key"""
+    matches = key_matches(query, per_kind)
+    if index_available():
+        matches += ranked_matches(query, per_kind)
+
+    # Keep the best per_kind hits for each kind, in rank order
+    ids_by_kind = {}
+    for kind, object_id in matches:
+        ids = ids_by_kind.setdefault(kind, [])
+        if kind is not None and len(ids) < per_kind and object_id not in ids:
+            ids.append(object_id)
+
+    results = {}
+    for kind, ids in ids_by_kind.items():
+        if kind is None or not ids:
+            continue
+        objects = kind.model.objects.in_bulk(ids)
+        results[kind.results_key] = [objects[object_id] for object_id in ids if object_id in objects]
+    return results
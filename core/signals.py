@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .content import kind_for_model
+from .indexes import bump_content_version
+from . import search
+
+# Models that are not searchable content but are still rendered on cached pages
+VERSIONED_MODELS = {'timeline.TimelineRelation', 'quiz.Quiz'}
+
+
+def _is_versioned(model):
+    return kind_for_model(model) is not None or model._meta.label in VERSIONED_MODELS
+
+
+@receiver(post_save)
+def content_saved(sender, instance, raw=False, **kwargs):
+    """Keep the search index row in sync and invalidate caches when content is saved"""
+    if raw or not _is_versioned(sender):
+        return
+    search.index_object(instance)
+    transaction.on_commit(bump_content_version)
+
+
+@receiver(post_delete)
+def content_deleted(sender, instance, **kwargs):
+    """Drop the search index row and invalidate caches when content is deleted"""
+    if not _is_versioned(sender):
+        return
+    search.remove_object(instance)
+    transaction.on_commit(bump_content_version)
+
+
+@receiver(m2m_changed)
+def content_relations_changed(sender, instance, action, **kwargs):
+    """Invalidate caches and in-process indexes when content relations change"""
+    if action.startswith('post_') and _is_versioned(type(instance)):
+        transaction.on_commit(bump_content_version)
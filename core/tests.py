@@ -1,3 +1,388 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from quiz.models import QuizAttempt
+from reference.models import Battle, Deity, Person
+from timeline.models import TimelineEvent, TimelineRelation
+from . import indexes, search
+from .cache import cache_public_page
+from .content import resolve_content
+from .featured import sample_featured
+from .geo import cover_bbox, encode_geohash
+from .indexes import CONTENT_VERSION_ID, ContentIndex, content_version
+from .intervals import IntervalIndex
+from .middleware import request_stats
+from .models import Civilization, ContentVersion, Favorite, UserNote
+from .text import normalize_key
+
+
+class GeohashTests(SimpleTestCase):
+    """Geohash encoding and bounding box covers used by the event map"""
+
+    def test_encode(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode_geohash(None, 10.0), '')
+
+    def test_cover_contains_points_in_box(self):
+        boxes = [(30, 10, 45, 30), (35.2, 20.1, 35.3, 20.2), (-10, 170, 10, -170)]
+        points = [(31, 11), (44.9, 29.9), (35.25, 20.15), (0, 179.5), (0, -179.5)]
+        for box in boxes:
+            cells = cover_bbox(*box)
+            self.assertLessEqual(len(cells), 32)
+            south, west, north, east = box
+            for lat, lng in points:
+                inside_lng = west <= lng <= east if west <= east else lng >= west or lng <= east
+                if south <= lat <= north and inside_lng:
+                    geohash = encode_geohash(lat, lng)
+                    self.assertTrue(any(geohash.startswith(cell) for cell in cells), (box, lat, lng))
+
+
+class NormalizeKeyTests(SimpleTestCase):
+    """Search keys fold Icelandic letters, case and accents"""
+
+    def test_normalize_key(self):
+        self.assertEqual(normalize_key('Þór'), 'thor')
+        self.assertEqual(normalize_key('Óðinn'), 'odinn')
+        self.assertEqual(normalize_key('Æsir'), 'aesir')
+        self.assertEqual(normalize_key('Aristóteles'), 'aristoteles')
+        self.assertEqual(normalize_key('Ramses  II.'), 'ramses ii')
+        self.assertEqual(normalize_key('Kleó\u00adpatra'), 'kleopatra')
+        self.assertEqual(normalize_key(None), '')
+
+
+class IntervalIndexTests(SimpleTestCase):
+    """Stabbing queries return exactly the intervals containing a point"""
+
+    def test_stab(self):
+        intervals = [(-500, -400, 'a'), (-450, -450, 'b'), (-1000, 100, 'c'), (-300, -200, 'd'), (-460, -440, 'e')]
+        index = IntervalIndex(intervals)
+        for x in range(-1100, 200, 10):
+            expected = [item for start, end, item in sorted(intervals) if start <= x <= end]
+            self.assertEqual(index.stab(x), expected, x)
+        self.assertEqual(IntervalIndex([]).stab(0), [])
+
+
+@override_settings(CONTENT_VERSION_TTL=0)
+class ContentVersionTests(TestCase):
+    """Indexes rebuild when any process bumps the shared content version"""
+
+    def test_bump_from_another_process(self):
+        builds = []
+        index = ContentIndex('test', lambda: builds.append(1) or len(builds))
+        self.addCleanup(indexes._registry.remove, index)
+        self.assertEqual(index.get(), 1)
+        self.assertEqual(index.get(), 1)
+
+        # Another worker bumps the version in the database, bypassing this process
+        version = content_version()
+        ContentVersion.objects.filter(pk=CONTENT_VERSION_ID).update(version=F('version') + 1)
+
+        self.assertNotEqual(content_version(), version)
+        self.assertEqual(index.get(), 2)
+
+    def test_bump_in_this_process(self):
+        version = content_version()
+        indexes.bump_content_version()
+        self.assertNotEqual(content_version(), version)
+
+    def test_conditional_page_follows_related_content(self):
+        event, other = [
+            TimelineEvent.objects.create(title=title, title_is=title, description='', description_is='', region='',
+                                         category='military', date_start=-490)
+            for title in ('Marathon', 'Thermopylae')
+        ]
+        url = reverse('timeline:event_detail', args=[event.id])
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A relation rendered on the page changes the validators, not the event row
+        with self.captureOnCommitCallbacks(execute=True):
+            TimelineRelation.objects.create(from_event=event, to_event=other, relation_type='cause')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        changed_at = ContentVersion.objects.get(pk=CONTENT_VERSION_ID).changed_at
+        self.assertEqual(response['Last-Modified'], http_date(max(changed_at, event.updated_at).timestamp()))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The full-text index uses SQLite FTS5')
+class SearchTests(TestCase):
+    """Full-text results are ranked and limited per kind"""
+
+    def test_grouped_and_ranked_per_kind(self):
+        for index in range(60):
+            TimelineEvent.objects.create(
+                title=f'Pericles speech {index}', title_is=f'Ræða Periklesar {index}', description='',
+                description_is='', region='', category='political', date_start=-431)
+        body_match, title_match = [
+            Person.objects.create(name=name, name_is=name, category='political', biography=biography,
+                                  biography_is='')
+            for name, biography in [('Aspasia', 'Companion of Pericles'), ('Pericles', 'Athenian statesman')]
+        ]
+        search.rebuild_index()
+
+        results = search.search('pericles', per_kind=5)
+        self.assertEqual(set(results), {'events', 'people'})
+        self.assertEqual(len(results['events']), 5)
+        self.assertEqual(results['people'], [title_match, body_match])
+
+    def test_exact_key_match_first(self):
+        people = [
+            Person.objects.create(name=name, name_is=name, category='ruler', biography='', biography_is='')
+            for name in ['Ptolemaios I', 'Ptolemaios II', 'Ptolemaios III', 'Ptólemaios']
+        ]
+        ids = [object_id for kind, object_id in search.key_matches('ptolemaios', per_kind=2)]
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(ids[0], people[3].pk)
+
+
+class WorldViewTests(TestCase):
+    """The world snapshot validates its parameters"""
+
+    def test_limit_bounds(self):
+        url = reverse('core:world')
+        self.assertEqual(self.client.get(url, {'year': -450, 'limit': 1}).status_code, 200)
+        for limit in (0, -5, 'x'):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.client.get(url, {'year': -450, 'limit': limit}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class AutocompleteViewTests(TestCase):
+    """Suggestions clamp the requested limit"""
+
+    def test_limit_is_clamped(self):
+        for name in ('Solon', 'Sokrates'):
+            Person.objects.create(name=name, name_is=name, category='political', biography='', biography_is='')
+        indexes.bump_content_version()
+        url = reverse('core:autocomplete')
+        for limit, expected in ((-5, 1), (0, 1), (1, 1), (10, 2)):
+            with self.subTest(limit=limit):
+                self.assertEqual(len(self.client.get(url, {'q': 'so', 'limit': limit}).json()['results']), expected)
+
+
+class FeaturedTests(TestCase):
+    """Featured content is sampled from id pools refreshed on content changes"""
+
+    def setUp(self):
+        self.events = [
+            TimelineEvent.objects.create(
+                title=str(importance), title_is=str(importance), description='', description_is='', region='',
+                category='political', date_start=0, importance=importance)
+            for importance in (1, 2, 3, 4, 4, 5, 5)
+        ]
+        self.people = [
+            Person.objects.create(name=name, name_is=name, category='other', biography='', biography_is='')
+            for name in ('Solon', 'Kleisthenes')
+        ]
+        indexes.bump_content_version()
+
+    def test_sample(self):
+        for attempt in range(20):
+            events = sample_featured('events', 3)
+            self.assertEqual(len(set(events)), 3)
+            self.assertTrue(all(event.importance >= 4 for event in events))
+        self.assertEqual(set(sample_featured('people', 3)), set(self.people))
+        self.assertEqual(sample_featured('deities', 3), [])
+
+    def test_pools_follow_content(self):
+        self.people[0].delete()
+        deity = Deity.objects.create(name='Athena', name_is='Aþena', domain='', domain_is='', mythology='',
+                                     mythology_is='')
+        indexes.bump_content_version()
+        self.assertEqual(sample_featured('people', 3), [self.people[1]])
+        self.assertEqual(sample_featured('deities', 3), [deity])
+
+    def test_home_does_not_sort_randomly(self):
+        self.client.get(reverse('core:home'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('core:home')).status_code, 200)
+        self.assertFalse([query['sql'] for query in queries if 'RANDOM()' in query['sql'].upper()])
+
+
+class ResolveContentTests(TestCase):
+    """Favorites and notes resolve with one query per content type"""
+
+    def test_resolve(self):
+        user = User.objects.create(username='plutarch')
+        event = TimelineEvent.objects.create(title='Salamis', title_is='Salamis', description='', description_is='',
+                                             region='', category='military', date_start=-480)
+        people = [
+            Person.objects.create(name=name, name_is=name, category='military', biography='', biography_is='')
+            for name in ('Themistocles', 'Xerxes')
+        ]
+        favorites = [Favorite.objects.create(user=user, content_type='event', object_id=event.pk)]
+        favorites += [Favorite.objects.create(user=user, content_type='person', object_id=person.pk) for person in people]
+        favorites.append(Favorite.objects.create(user=user, content_type='person', object_id=people[1].pk + 100))
+        favorites.append(Favorite.objects.create(user=user, content_type='unknown', object_id=1))
+        note = UserNote.objects.create(user=user, content_type='person', object_id=people[0].pk, note='Admiral')
+
+        with self.assertNumQueries(3):
+            resolved = resolve_content(user.favorites.order_by('id'))
+        self.assertEqual([favorite.content_object for favorite in resolved], [event, *people, None, None])
+        self.assertEqual(resolved[0].content_url, reverse('timeline:event_detail', args=[event.pk]))
+        self.assertIsNone(resolved[3].content_url)
+
+        self.assertEqual(resolve_content([note])[0].content_object, people[0])
+
+
+@override_settings(CONTENT_VERSION_TTL=60)
+class PageCacheTests(TestCase):
+    """Anonymous GETs of public pages are cached until content changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.event = TimelineEvent.objects.create(title='Marathon', title_is='Maraþon', description='',
+                                                  description_is='', region='', category='military',
+                                                  date_start=-490)
+        self.url = reverse('timeline:filter_events')
+
+    def titles(self):
+        return [event['title'] for event in self.client.get(self.url).json()['events']]
+
+    def assertRendered(self, rendered=True):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries) > 0, rendered)
+
+    def test_repeat_get_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+
+    def test_content_changes_invalidate(self):
+        self.assertEqual(self.titles(), ['Maraþon'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.title_is = 'Salamis'
+            self.event.save()
+        self.assertEqual(self.titles(), ['Salamis'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.delete()
+        self.assertEqual(self.titles(), [])
+
+        battle = Battle.objects.create(name='Marathon', name_is='Maraþon', date=-490, location='Attica',
+                                       description='', description_is='', outcome='', outcome_is='',
+                                       significance='', significance_is='')
+        civilization = Civilization.objects.create(name='Athens', name_is='Aþena', start_year=-800,
+                                                   end_year=-300, region='Greece', description='',
+                                                   description_is='')
+        self.titles()
+        self.assertRendered(False)
+        with self.captureOnCommitCallbacks(execute=True):
+            battle.participants.add(civilization)
+        self.assertRendered()
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.force_login(User.objects.create(username='herodotus'))
+        self.client.get(self.url)
+        self.assertRendered()
+        self.client.logout()
+        self.assertRendered()
+
+    def test_uncacheable_responses_are_not_stored(self):
+        calls = []
+
+        def page(status=200, cookie=False):
+            @cache_public_page
+            def view(request):
+                calls.append(request.path)
+                response = HttpResponse('page', status=status)
+                if cookie:
+                    response.set_cookie('visitor', '1')
+                return response
+            return view
+
+        factory = RequestFactory()
+        for path, view, renders in [('/plain/', page(), 1), ('/cookie/', page(cookie=True), 2),
+                                    ('/missing/', page(status=404), 2), ('/error/', page(status=500), 2)]:
+            for _ in range(2):
+                request = factory.get(path)
+                request.user = AnonymousUser()
+                view(request)
+            self.assertEqual(calls.count(path), renders, path)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class QueryInstrumentationTests(TestCase):
+    """Per-view query metrics, debug headers, budgets and the stats endpoint"""
+
+    def setUp(self):
+        request_stats.reset()
+        self.addCleanup(request_stats.reset)
+        TimelineEvent.objects.create(title='Marathon', title_is='Maraþon', description='', description_is='',
+                                     region='', category='military', date_start=-490)
+        self.url = reverse('timeline:filter_events')
+
+    def test_debug_headers(self):
+        with override_settings(DEBUG=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-View-Name'], 'timeline:filter_events')
+        self.assertEqual(int(response['X-Query-Count']), len(queries))
+        self.assertGreaterEqual(float(response['X-DB-Time-ms']), 0)
+        self.assertGreaterEqual(float(response['X-Render-Time-ms']), 0)
+        self.assertEqual(int(response['X-Response-Size']), len(response.content))
+
+        self.assertNotIn('X-Query-Count', self.client.get(self.url))
+
+    def test_views_are_aggregated(self):
+        sizes = [len(self.client.get(self.url, {'limit': limit}).content) for limit in (1, 2)]
+        self.client.get(reverse('core:world'))
+        summary = request_stats.summary()
+        self.assertEqual(summary['timeline:filter_events']['requests'], 2)
+        self.assertEqual(summary['timeline:filter_events']['avg_bytes'], sum(sizes) / 2)
+        self.assertGreater(summary['timeline:filter_events']['max_queries'], 0)
+        self.assertEqual(summary['core:world']['requests'], 1)
+
+        self.client.force_login(User.objects.create(username='admin', is_staff=True))
+        stats = self.client.get(reverse('core:request_stats')).json()['views']
+        self.assertEqual(stats['timeline:filter_events'], summary['timeline:filter_events'])
+        self.client.get(reverse('core:request_stats'), {'reset': 1})
+        self.assertEqual(list(request_stats.summary()), ['core:request_stats'])
+
+    @override_settings(QUERY_BUDGETS={'timeline:filter_events': 0})
+    def test_over_budget_is_logged(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(self.url)
+        self.assertIn('timeline:filter_events ran', logs.output[0])
+        self.assertIn('(budget 0)', logs.output[0])
+
+    def test_within_budget_is_not_logged(self):
+        with self.assertNoLogs('core.middleware', 'WARNING'):
+            self.client.get(self.url)
+
+    def test_stats_are_staff_only(self):
+        url = reverse('core:request_stats')
+        login = reverse('admin:login')
+        self.assertTrue(self.client.get(url)['Location'].startswith(login))
+        self.client.force_login(User.objects.create(username='reader'))
+        self.assertTrue(self.client.get(url)['Location'].startswith(login))
+        self.client.force_login(User.objects.create(username='admin', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class GenerateSyntheticDataTests(TestCase):
+    """The generator handles every volume the command line accepts"""
+
+    def test_smallest_scale(self):
+        # Every volume floors at one row, so there is a single event and no pair to relate
+        call_command('generate_synthetic_data', scale=0.00001, seed=1, stdout=StringIO())
+        self.assertEqual(TimelineEvent.objects.count(), 1)
+        self.assertFalse(TimelineRelation.objects.exists())
+        # Attempts are spread over the history rather than sharing the generation time
+        start_times = QuizAttempt.objects.values_list('start_time', flat=True)
+        self.assertGreater(len(start_times), 1)
+        self.assertEqual(len(set(start_times)), len(start_times))
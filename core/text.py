@@ -0,0 +1,30 @@
+import re
+import unicodedata
+
+# Icelandic letters that do not decompose into a base letter plus accents
+TRANSLITERATIONS = str.maketrans({
+    'þ': 'th',
+    'ð': 'd',
+    'æ': 'ae',
+    'ø': 'o',
+    'œ': 'oe',
+})
+
+
+def normalize_key(value):
+    """Fold text into a search key: 'Þór' -> 'thor', 'Aristóteles' -> 'aristoteles'"""
+    if not value:
+        return ''
+    value = value.casefold().translate(TRANSLITERATIONS)
+    value = unicodedata.normalize('NFKD', value)
+    # Drop accents and invisible format characters such as soft hyphens
+    value = ''.join(
+        char for char in value
+        if not unicodedata.combining(char) and unicodedata.category(char) != 'Cf'
+    )
+    return ' '.join(re.findall(r'\w+', value))
+
+
+def prefix_range(field, key):
+    """Lookup kwargs matching values of an indexed key column starting with key"""
+    return {f'{field}__gte': key, f'{field}__lt': key + '\uffff'}
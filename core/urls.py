@@ -8,4 +8,7 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('profile/', views.profile, name='profile'),
     path('search/', views.search, name='search'),
+    path('search/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('world/', views.world, name='world'),
+    path('stats/requests/', views.request_stats_view, name='request_stats'),
 ]
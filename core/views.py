@@ -1,15 +1,23 @@
 from django.shortcuts import render
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
-from timeline.models import TimelineEvent
-from reference.models import Person, Deity
-from quiz.models import Quiz, QuizAttempt
+from django.contrib.admin.views.decorators import staff_member_required
+from quiz.models import Quiz, QuizAttempt, QuizProgress
+from quiz.views import attempt_history_page
+from .search import search as search_content
+from .autocomplete import complete
+from .featured import sample_featured
+from .content import resolve_content
+from .cache import cache_public_page
+from .middleware import request_stats
+from .world import world_at
 
 def home(request):
     """Home/Dashboard view with recent activities and featured content"""
-    # Get featured content
-    featured_events = TimelineEvent.objects.filter(importance__gte=4).order_by('?')[:3]
-    featured_people = Person.objects.order_by('?')[:3]
-    featured_deities = Deity.objects.order_by('?')[:3]
+    # Get featured content sampled from the precomputed pools (see core.featured)
+    featured_events = sample_featured('events', 3)
+    featured_people = sample_featured('people', 3)
+    featured_deities = sample_featured('deities', 3)
 
     # Get recent quizzes
     recent_quizzes = Quiz.objects.filter(is_published=True).order_by('-created_at')[:5]
@@ -18,10 +26,11 @@ def home(request):
     user_progress = None
     recent_attempts = None
     if request.user.is_authenticated:
-        recent_attempts = QuizAttempt.objects.filter(user=request.user).order_by('-start_time')[:5]
-        # Calculate overall progress (could be more sophisticated)
+        recent_attempts = QuizAttempt.objects.filter(user=request.user).select_related('quiz').order_by('-start_time')[:5]
+        # Calculate overall progress from the maintained rollup (see quiz.progress)
         total_quizzes = Quiz.objects.filter(is_published=True).count()
-        completed_quizzes = QuizAttempt.objects.filter(user=request.user, completed=True).values('quiz').distinct().count()
+        progress = QuizProgress.objects.filter(user=request.user).first()
+        completed_quizzes = progress.completed_quizzes if progress else 0
         if total_quizzes > 0:
             user_progress = (completed_quizzes / total_quizzes) * 100
         else:
@@ -38,6 +47,7 @@ def home(request):
 
     return render(request, 'core/home.html', context)
 
+@cache_public_page
 def about(request):
     """About page with information about the application"""
     return render(request, 'core/about.html')
@@ -45,17 +55,22 @@ def about(request):
 @login_required
 def profile(request):
     """User profile page"""
-    # Get user's quiz attempts
-    quiz_attempts = QuizAttempt.objects.filter(user=request.user).order_by('-start_time')
+    # Get the first page of the user's quiz attempts; later pages come from quiz:attempt_history
+    quiz_attempts, next_cursor = attempt_history_page(request.user)
 
     # Get user's achievements
     achievements = request.user.achievements.all()
 
-    # Get user's favorites
-    favorites = request.user.favorites.all()
+    # Get user's favorites with their content objects, one query per content type
+    favorites = resolve_content(request.user.favorites.order_by('-created_at'))
+
+    # Get user's progress rollup
+    progress = QuizProgress.objects.filter(user=request.user).first()
 
     context = {
         'quiz_attempts': quiz_attempts,
+        'next_cursor': next_cursor,
+        'progress': progress,
         'achievements': achievements,
         'favorites': favorites,
     }
@@ -68,16 +83,8 @@ def search(request):
     results = {}
 
     if query:
-        # Search in timeline events
-        results['events'] = TimelineEvent.objects.filter(title_is__icontains=query)[:10]
-
-        # Search in people
-        results['people'] = Person.objects.filter(name_is__icontains=query)[:10]
-
-        # Search in deities
-        results['deities'] = Deity.objects.filter(name_is__icontains=query)[:10]
-
-        # Add more search categories as needed
+        # Ranked full-text search over every content model (see core.search)
+        results = search_content(query)
 
     context = {
         'query': query,
@@ -85,3 +92,42 @@ def search(request):
     }
 
     return render(request, 'core/search_results.html', context)
+
+def autocomplete(request):
+    """JSON search-as-you-type suggestions served from the in-memory prefix index"""
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+    except ValueError:
+        limit = 10
+
+    return JsonResponse({'query': query, 'results': complete(query, limit)})
+
+def world(request):
+    """JSON snapshot of every event, person, civilization, period and battle active in ?year=
+
+    Served from the in-memory interval indexes in core.world without touching
+    the database, since a year slider fires many of these per second.
+    """
+    try:
+        year = int(request.GET['year'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'year must be an integer'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', 200)), 1000)
+        if limit < 1:
+            raise ValueError('Invalid limit')
+    except ValueError:
+        return JsonResponse({'error': 'limit must be a positive integer'}, status=400)
+
+    results = {}
+    for key, items in world_at(year).items():
+        results[key] = {'count': len(items), 'items': items[:limit]}
+    return JsonResponse({'year': year, 'results': results})
+
+@staff_member_required
+def request_stats_view(request):
+    """Aggregated per-view query and timing metrics for this worker process"""
+    if request.GET.get('reset'):
+        request_stats.reset()
+    return JsonResponse({'views': request_stats.summary()})
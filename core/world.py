@@ -0,0 +1,47 @@
+from django.apps import apps
+
+from .content import KINDS_BY_LABEL
+from .indexes import ContentIndex
+from .intervals import IntervalIndex
+
+# results key -> (model label, start field, end field or None, name field, extra fields)
+WORLD_SOURCES = {
+    'events': ('timeline.TimelineEvent', 'date_start', 'date_end', 'title_is', ['category', 'importance']),
+    'people': ('reference.Person', 'birth_date', 'death_date', 'name_is', ['category']),
+    'civilizations': ('core.Civilization', 'start_year', 'end_year', 'name_is', ['region']),
+    'periods': ('core.HistoricalPeriod', 'start_year', 'end_year', 'name_is', []),
+    'battles': ('reference.Battle', 'date', None, 'name_is', ['location']),
+}
+
+
+def build_world():
+    """One IntervalIndex of ready-to-send item dicts per dated content type
+
+    An interval with only one known year covers just that year.
+    """
+    indexes = {}
+    for key, (label, start_field, end_field, name_field, fields) in WORLD_SOURCES.items():
+        kind = KINDS_BY_LABEL[label]
+        columns = ['id', start_field, end_field or start_field, name_field, *fields]
+        intervals = []
+        for object_id, start, end, name, *extra in apps.get_model(label).objects.order_by().values_list(
+                *columns).iterator():
+            if start is None:
+                start = end
+            if start is None:
+                continue
+            if end is None or end < start:
+                end = start
+            item = {'id': object_id, 'name': name, 'start': start, 'end': end, 'url': kind.get_url(object_id)}
+            item.update(zip(fields, extra))
+            intervals.append((start, end, item))
+        indexes[key] = IntervalIndex(intervals)
+    return indexes
+
+
+world_index = ContentIndex('world', build_world)
+
+
+def world_at(year):
+    """{results key: [items]} for everything active in a year, each list in start order"""
+    return {key: index.stab(year) for key, index in world_index.get().items()}
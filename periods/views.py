@@ -3,7 +3,9 @@ from core.models import HistoricalPeriod
 from timeline.models import TimelineEvent
 from reference.models import Person, Deity, CulturalTopic
 from quiz.models import Quiz
+from core.cache import cache_public_page
 
+@cache_public_page
 def period_home(request, period_slug):
     """Main view for a historical period (Grikkland, Róm, Miðaldir)"""
     # Get the period by slug
@@ -34,6 +36,7 @@ def period_home(request, period_slug):
 
     return render(request, 'periods/period_home.html', context)
 
+@cache_public_page
 def period_timeline(request, period_slug):
     """Timeline view for a specific historical period"""
     # Get the period by slug
@@ -56,6 +59,7 @@ def period_timeline(request, period_slug):
 
     return render(request, 'periods/period_timeline.html', context)
 
+@cache_public_page
 def period_people(request, period_slug):
     """Who's who (Hver-er-hver) view for a specific historical period"""
     # Get the period by slug
@@ -86,6 +90,7 @@ def period_people(request, period_slug):
 
     return render(request, 'periods/period_people.html', context)
 
+@cache_public_page
 def period_culture(request, period_slug):
     """Culture (menning) view for a specific historical period"""
     # Get the period by slug
@@ -115,6 +120,7 @@ def period_culture(request, period_slug):
 
     return render(request, 'periods/period_culture.html', context)
 
+@cache_public_page
 def period_quiz(request, period_slug):
     """Quiz view for a specific historical period"""
     # Get the period by slug
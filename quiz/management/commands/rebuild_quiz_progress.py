@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quiz import progress
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-user quiz progress rollups from the attempt history'
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        users = progress.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt quiz progress for {users} users'))
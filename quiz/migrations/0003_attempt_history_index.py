@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0002_progress_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', 'start_time', 'id'], name='quiz_attempt_user_start_idx'),
+        ),
+    ]
@@ -92,6 +92,53 @@ class QuizAttempt(models.Model):
             return (self.end_time - self.start_time).total_seconds()
         return None
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's history (see core.pagination)
+            models.Index(fields=['user', 'start_time', 'id'], name='quiz_attempt_user_start_idx'),
+        ]
+
+class QuizProgress(models.Model):
+    """Per-user rollup of quiz attempts, kept up to date by quiz.signals"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='quiz_progress')
+    completed_quizzes = models.IntegerField(default=0)  # Distinct quizzes with a completed attempt
+    total_attempts = models.IntegerField(default=0)
+    completed_attempts = models.IntegerField(default=0)
+    total_score = models.IntegerField(default=0)
+    total_max_score = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s quiz progress"
+
+    @property
+    def average_percentage(self):
+        if self.total_max_score > 0:
+            return (self.total_score / self.total_max_score) * 100
+        return 0
+
+class QuizBestScore(models.Model):
+    """A user's best attempt at a quiz, kept up to date by quiz.signals"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_best_scores')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='best_scores')
+    best_attempt = models.ForeignKey(QuizAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    best_score = models.IntegerField(default=0)
+    best_max_score = models.IntegerField(default=0)
+    attempts = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.user.username}'s best at {self.quiz.title_is}"
+
+    @property
+    def percentage_score(self):
+        if self.best_max_score > 0:
+            return (self.best_score / self.best_max_score) * 100
+        return 0
+
+    class Meta:
+        unique_together = ('user', 'quiz')
+
 class QuestionResponse(models.Model):
     """Individual responses to questions within a quiz attempt"""
     attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='responses')
@@ -0,0 +1,124 @@
+from django.db.models import F
+
+from .models import QuizAttempt, QuizProgress, QuizBestScore
+
+
+def _ratio(score, max_score):
+    return score / max_score if max_score > 0 else 0
+
+
+def _is_better(score, max_score, best_score, best_max_score):
+    return _ratio(score, max_score) > _ratio(best_score, best_max_score)
+
+
+def record_attempt(attempt, previous=None):
+    """Apply a saved attempt to the rollups; previous is its stored (user_id, quiz_id, score, max_score, completed)"""
+    if previous and previous[:2] != (attempt.user_id, attempt.quiz_id):
+        # Moved to another user or quiz: take it out of the old rollups and count it as new
+        _forget(*previous)
+        previous = None
+    old_score, old_max_score, old_completed = previous[2:] if previous else (0, 0, False)
+    new_attempt = 0 if previous else 1
+
+    best, _ = QuizBestScore.objects.get_or_create(user_id=attempt.user_id, quiz_id=attempt.quiz_id)
+    got_worse = best.best_attempt_id == attempt.pk and _is_better(
+        old_score, old_max_score, attempt.score, attempt.max_score)
+    if previous and (got_worse or (old_completed and not attempt.completed)):
+        # The best attempt now scores lower or an attempt is no longer complete,
+        # so another attempt may be the best and the quiz may not be completed
+        newly_completed = False
+        rebuild_best_score(attempt.user_id, attempt.quiz_id)
+    else:
+        newly_completed = attempt.completed and not best.completed
+        if best.best_attempt_id is None or _is_better(
+                attempt.score, attempt.max_score, best.best_score, best.best_max_score):
+            best.best_attempt = attempt
+            best.best_score = attempt.score
+            best.best_max_score = attempt.max_score
+        best.attempts += new_attempt
+        best.completed = best.completed or attempt.completed
+        best.save()
+
+    QuizProgress.objects.get_or_create(user_id=attempt.user_id)
+    QuizProgress.objects.filter(user_id=attempt.user_id).update(
+        total_attempts=F('total_attempts') + new_attempt,
+        completed_attempts=F('completed_attempts') + int(attempt.completed) - int(old_completed),
+        total_score=F('total_score') + attempt.score - old_score,
+        total_max_score=F('total_max_score') + attempt.max_score - old_max_score,
+        completed_quizzes=F('completed_quizzes') + int(newly_completed),
+    )
+
+
+def forget_attempt(attempt):
+    """Remove a deleted attempt from the rollups"""
+    _forget(attempt.user_id, attempt.quiz_id, attempt.score, attempt.max_score, attempt.completed)
+
+
+def _forget(user_id, quiz_id, score, max_score, completed):
+    QuizProgress.objects.filter(user_id=user_id).update(
+        total_attempts=F('total_attempts') - 1,
+        completed_attempts=F('completed_attempts') - int(completed),
+        total_score=F('total_score') - score,
+        total_max_score=F('total_max_score') - max_score,
+    )
+    rebuild_best_score(user_id, quiz_id)
+
+
+def rebuild_best_score(user_id, quiz_id):
+    """Recompute one user's best-score row for a quiz from their attempts"""
+    best = QuizBestScore.objects.filter(user_id=user_id, quiz_id=quiz_id).first()
+    was_completed = best.completed if best else False
+    attempts = QuizAttempt.objects.filter(user_id=user_id, quiz_id=quiz_id).values_list(
+        'pk', 'score', 'max_score', 'completed')
+
+    best_row = None
+    count = 0
+    completed = False
+    for row in attempts:
+        count += 1
+        completed = completed or row[3]
+        if best_row is None or _is_better(row[1], row[2], best_row[1], best_row[2]):
+            best_row = row
+
+    if best_row is None:
+        QuizBestScore.objects.filter(user_id=user_id, quiz_id=quiz_id).delete()
+    elif best:
+        best.best_attempt_id, best.best_score, best.best_max_score = best_row[:3]
+        best.attempts = count
+        best.completed = completed
+        best.save()
+    if was_completed != completed:
+        QuizProgress.objects.filter(user_id=user_id).update(
+            completed_quizzes=F('completed_quizzes') + (1 if completed else -1))
+
+
+def rebuild_all():
+    """Rebuild every rollup row from the attempt history"""
+    QuizBestScore.objects.all().delete()
+    QuizProgress.objects.all().delete()
+
+    progress = {}
+    best = {}
+    attempts = QuizAttempt.objects.values_list('pk', 'user_id', 'quiz_id', 'score', 'max_score', 'completed')
+    for pk, user_id, quiz_id, score, max_score, completed in attempts.iterator():
+        row = progress.setdefault(user_id, QuizProgress(user_id=user_id))
+        row.total_attempts += 1
+        row.completed_attempts += int(completed)
+        row.total_score += score
+        row.total_max_score += max_score
+
+        best_row = best.get((user_id, quiz_id))
+        if best_row is None:
+            best_row = best[(user_id, quiz_id)] = QuizBestScore(
+                user_id=user_id, quiz_id=quiz_id, best_attempt_id=pk,
+                best_score=score, best_max_score=max_score)
+        elif _is_better(score, max_score, best_row.best_score, best_row.best_max_score):
+            best_row.best_attempt_id, best_row.best_score, best_row.best_max_score = pk, score, max_score
+        best_row.attempts += 1
+        if completed and not best_row.completed:
+            best_row.completed = True
+            row.completed_quizzes += 1
+
+    QuizProgress.objects.bulk_create(progress.values(), batch_size=1000)
+    QuizBestScore.objects.bulk_create(best.values(), batch_size=1000)
+    return len(progress)
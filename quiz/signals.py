@@ -0,0 +1,28 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import QuizAttempt
+from . import progress
+
+
+@receiver(pre_save, sender=QuizAttempt)
+def remember_previous_attempt(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of an attempt so the rollups can apply the difference"""
+    instance._rollup_previous = None
+    if not raw and instance.pk:
+        instance._rollup_previous = QuizAttempt.objects.filter(pk=instance.pk).values_list(
+            'user_id', 'quiz_id', 'score', 'max_score', 'completed').first()
+
+
+@receiver(post_save, sender=QuizAttempt)
+def update_progress_rollups(sender, instance, raw=False, **kwargs):
+    """Update the user's progress rollups when an attempt is saved"""
+    if raw:
+        return
+    progress.record_attempt(instance, getattr(instance, '_rollup_previous', None))
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def remove_from_progress_rollups(sender, instance, **kwargs):
+    """Update the user's progress rollups when an attempt is deleted"""
+    progress.forget_attempt(instance)
@@ -1,3 +1,138 @@
+import random
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.pagination import encode_cursor
+from . import progress
+from .models import Quiz, QuizAttempt, QuizBestScore, QuizProgress
+from .views import attempt_history_page
+
+
+class ProgressRollupTests(TestCase):
+    """The rollups maintained on save and delete match a full rebuild"""
+
+    def rollups(self):
+        return (
+            set(QuizProgress.objects.values_list(
+                'user_id', 'total_attempts', 'completed_attempts', 'total_score', 'total_max_score',
+                'completed_quizzes')),
+            set(QuizBestScore.objects.values_list(
+                'user_id', 'quiz_id', 'best_score', 'best_max_score', 'attempts', 'completed')),
+        )
+
+    def assertRollupsCurrent(self):
+        maintained = self.rollups()
+        progress.rebuild_all()
+        self.assertEqual(maintained, self.rollups())
+
+    def test_random_edits_match_rebuild(self):
+        rng = random.Random(5)
+        users = [User.objects.create(username=f'user{index}') for index in range(3)]
+        quizzes = [
+            Quiz.objects.create(title=str(index), title_is=str(index), description='', description_is='',
+                                quiz_type='period')
+            for index in range(2)
+        ]
+        attempts = []
+        for step in range(120):
+            action = rng.random()
+            if action < 0.4 or not attempts:
+                attempts.append(QuizAttempt.objects.create(
+                    user=rng.choice(users), quiz=rng.choice(quizzes), max_score=10,
+                    score=rng.randint(0, 10), completed=rng.random() < 0.5))
+            elif action < 0.85:
+                attempt = rng.choice(attempts)
+                attempt.score = rng.randint(0, 10)
+                attempt.completed = rng.random() < 0.5
+                attempt.save()
+            else:
+                attempts.pop(rng.randrange(len(attempts))).delete()
+            if step % 10 == 0:
+                self.assertRollupsCurrent()
+        self.assertRollupsCurrent()
+
+    def test_uncompleting_an_attempt(self):
+        user = User.objects.create(username='solon')
+        quiz = Quiz.objects.create(title='Athens', title_is='Aþena', description='', description_is='',
+                                   quiz_type='period')
+        attempt = QuizAttempt.objects.create(user=user, quiz=quiz, score=8, max_score=10, completed=True)
+        attempt.completed = False
+        attempt.save()
+        self.assertEqual(QuizProgress.objects.get(user=user).completed_quizzes, 0)
+        self.assertFalse(QuizBestScore.objects.get(user=user, quiz=quiz).completed)
+        self.assertRollupsCurrent()
+
+    def test_reassigning_an_attempt(self):
+        solon, pericles = User.objects.create(username='solon'), User.objects.create(username='pericles')
+        athens, sparta = [
+            Quiz.objects.create(title=title, title_is=title, description='', description_is='', quiz_type='period')
+            for title in ['Athens', 'Sparta']
+        ]
+        QuizAttempt.objects.create(user=solon, quiz=athens, score=2, max_score=10, completed=False)
+        QuizAttempt.objects.create(user=pericles, quiz=athens, score=3, max_score=10, completed=True)
+        attempt = QuizAttempt.objects.create(user=solon, quiz=athens, score=9, max_score=10, completed=True)
+
+        attempt.quiz = sparta
+        attempt.save()
+        self.assertEqual(QuizProgress.objects.get(user=solon).completed_quizzes, 1)
+        self.assertEqual(QuizBestScore.objects.get(user=solon, quiz=athens).best_score, 2)
+        self.assertRollupsCurrent()
+
+        attempt.user = pericles
+        attempt.save()
+        self.assertEqual(QuizProgress.objects.get(user=solon).completed_quizzes, 0)
+        self.assertFalse(QuizBestScore.objects.filter(user=solon, quiz=sparta).exists())
+        self.assertEqual(QuizProgress.objects.get(user=pericles).completed_quizzes, 2)
+        self.assertRollupsCurrent()
+
+
+class AttemptHistoryTests(TestCase):
+    """Attempt history pages walk every attempt newest first, one keyset page at a time"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='herodotus')
+        quiz = Quiz.objects.create(title='Persia', title_is='Persía', description='', description_is='',
+                                   quiz_type='period')
+        attempts = [QuizAttempt.objects.create(user=self.user, quiz=quiz, max_score=10) for index in range(25)]
+        # start_time is auto_now_add; spread it out with ties so the id tie-breaker matters
+        now = timezone.now()
+        for index, attempt in enumerate(attempts):
+            attempt.start_time = now - timedelta(minutes=index // 3)
+        QuizAttempt.objects.bulk_update(attempts, ['start_time'])
+        self.expected = list(QuizAttempt.objects.order_by('-start_time', '-id').values_list('id', flat=True))
+
+    def test_pages_cover_history(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = attempt_history_page(self.user, cursor, limit=7)
+            seen += [attempt.id for attempt in page]
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_load_more_endpoint(self):
+        self.client.force_login(self.user)
+        url = reverse('quiz:attempt_history')
+        first = self.client.get(url, {'limit': 10}).json()
+        second = self.client.get(url, {'limit': 10, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([attempt['id'] for attempt in first['attempts'] + second['attempts']], self.expected[:20])
+        for params in ({'limit': 0}, {'limit': 'x'}, {'cursor': encode_cursor([{}, 1])}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
 
-# Create your tests here.
+    def test_page_cost_is_constant(self):
+        self.client.force_login(self.user)
+        url = reverse('quiz:attempt_history')
+        # Session, user and one attempts query joined to its quiz
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        quiz = Quiz.objects.get()
+        QuizAttempt.objects.bulk_create(QuizAttempt(user=self.user, quiz=quiz, max_score=10) for index in range(50))
+        with self.assertNumQueries(3):
+            self.client.get(url, {'limit': 50})
@@ -13,5 +13,6 @@ urlpatterns = [
     path('take/<int:quiz_id>/', views.take_quiz, name='take_quiz'),
     path('result/<int:attempt_id>/', views.quiz_result, name='quiz_result'),
     path('progress/', views.progress, name='progress'),
+    path('progress/attempts/', views.attempt_history, name='attempt_history'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
 ]
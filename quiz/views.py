@@ -5,9 +5,10 @@ from django.utils import timezone
 from django.db import models
 from .models import (
     Quiz, Question, QuizAttempt, QuestionResponse, 
-    Achievement, UserAchievement
+    Achievement, UserAchievement, QuizProgress
 )
 from core.models import HistoricalPeriod
+from core.pagination import keyset_page
 import json
 import random
 
@@ -353,38 +354,51 @@ def quiz_result(request, attempt_id):
     }
     return render(request, 'quiz/quiz_result.html', context)
 
+ATTEMPTS_PER_PAGE = 20
+
+def attempt_history_page(user, cursor=None, limit=ATTEMPTS_PER_PAGE):
+    """One keyset page of a user's attempts, newest first"""
+    attempts = QuizAttempt.objects.filter(user=user).select_related('quiz')
+    return keyset_page(attempts, ['start_time', 'id'], cursor=cursor, limit=limit, descending=True)
+
 @login_required
 def progress(request):
     """View user's progress"""
-    # Get user's quiz attempts
-    attempts = QuizAttempt.objects.filter(user=request.user).order_by('-start_time')
-
-    # Calculate statistics
-    total_attempts = attempts.count()
-    completed_attempts = attempts.filter(completed=True).count()
-    total_score = sum(a.score for a in attempts)
-    max_score = sum(a.max_score for a in attempts)
-    average_percentage = (total_score / max_score * 100) if max_score > 0 else 0
-
-    # Get attempts by period
-    periods = HistoricalPeriod.objects.all()
+    # Get one page of the user's quiz attempts
+    try:
+        page, next_cursor = attempt_history_page(request.user, request.GET.get('cursor'))
+    except ValueError:
+        page, next_cursor = attempt_history_page(request.user)
+    attempts = QuizAttempt.objects.filter(user=request.user)
+
+    # Read overall statistics from the maintained rollup (see quiz.progress)
+    rollup = QuizProgress.objects.filter(user=request.user).first() or QuizProgress(user=request.user)
+    total_attempts = rollup.total_attempts
+    completed_attempts = rollup.completed_attempts
+    average_percentage = rollup.average_percentage
+
+    # Get attempts by period in a single grouped query
+    period_rows = attempts.filter(completed=True, quiz__period__isnull=False).order_by().values(
+        'quiz__period').annotate(
+        attempt_count=models.Count('id'),
+        score_sum=models.Sum('score'),
+        max_sum=models.Sum('max_score'),
+    )
+    periods = HistoricalPeriod.objects.in_bulk([row['quiz__period'] for row in period_rows])
     period_stats = {}
-    for period in periods:
-        period_attempts = attempts.filter(quiz__period=period, completed=True)
-        if period_attempts.exists():
-            period_score = sum(a.score for a in period_attempts)
-            period_max = sum(a.max_score for a in period_attempts)
-            period_percentage = (period_score / period_max * 100) if period_max > 0 else 0
-            period_stats[period] = {
-                'attempts': period_attempts.count(),
-                'percentage': period_percentage,
-            }
+    for row in period_rows:
+        period_max = row['max_sum'] or 0
+        period_stats[periods[row['quiz__period']]] = {
+            'attempts': row['attempt_count'],
+            'percentage': (row['score_sum'] / period_max * 100) if period_max > 0 else 0,
+        }
 
     # Get achievements
     achievements = request.user.achievements.all().select_related('achievement')
 
     context = {
-        'attempts': attempts,
+        'attempts': page,
+        'next_cursor': next_cursor,
         'total_attempts': total_attempts,
         'completed_attempts': completed_attempts,
         'average_percentage': average_percentage,
@@ -393,6 +407,31 @@ def progress(request):
     }
     return render(request, 'quiz/progress.html', context)
 
+@login_required
+def attempt_history(request):
+    """JSON "load more" endpoint for the user's attempt history"""
+    try:
+        limit = min(int(request.GET.get('limit', ATTEMPTS_PER_PAGE)), 100)
+        if limit < 1:
+            raise ValueError('Invalid limit')
+        page, next_cursor = attempt_history_page(request.user, request.GET.get('cursor'), limit)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+
+    attempts_data = []
+    for attempt in page:
+        attempts_data.append({
+            'id': attempt.id,
+            'quiz': attempt.quiz.title_is,
+            'score': attempt.score,
+            'max_score': attempt.max_score,
+            'percentage': attempt.percentage_score,
+            'completed': attempt.completed,
+            'start_time': attempt.start_time.isoformat(),
+        })
+
+    return JsonResponse({'attempts': attempts_data, 'next_cursor': next_cursor})
+
 def leaderboard(request):
     """View leaderboard"""
     # Get top users by quiz score
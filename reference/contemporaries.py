@@ -0,0 +1,159 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.db.models import Q
+
+from .models import Contemporary, Person
+
+CONTEMPORARIES_PER_PERSON = 10
+
+# Sharing a civilization or period counts like this many extra years of overlap
+SHARED_CIVILIZATION_BONUS = 25
+SHARED_PERIOD_BONUS = 10
+MAX_BONUS = SHARED_CIVILIZATION_BONUS + SHARED_PERIOD_BONUS
+
+PersonSpan = namedtuple('PersonSpan', 'id birth death civilization_id period_id')
+
+
+def _score(span, other, overlap):
+    score = overlap
+    if span.civilization_id is not None and span.civilization_id == other.civilization_id:
+        score += SHARED_CIVILIZATION_BONUS
+    if span.period_id is not None and span.period_id == other.period_id:
+        score += SHARED_PERIOD_BONUS
+    return score
+
+
+class _Sweep:
+    """Lifespans in birth order plus the people alive at the current birth, latest death first"""
+
+    def __init__(self, spans):
+        self.spans = spans
+        self.births = [span.birth for span in spans]
+        self.alive = []  # (-death, id, span)
+        self.alive_ids = set()
+
+    def advance(self, birth):
+        while self.alive and -self.alive[-1][0] < birth:
+            self.alive_ids.discard(self.alive.pop()[1])
+
+    def add(self, span):
+        insort(self.alive, (-span.death, span.id, span))
+        self.alive_ids.add(span.id)
+
+    def scan(self, span, bonus, consider, beaten, skip=None):
+        """Offer span's contemporaries to consider until beaten(overlap + bonus) says none can rank"""
+        # Alive when span was born: the overlap only shrinks in this order
+        for negative_death, _, other in self.alive:
+            overlap = min(span.death, -negative_death) - span.birth
+            if beaten(overlap + bonus):
+                break
+            if skip is None or not skip(other):
+                consider(other, overlap)
+
+        # Born during span's life: the overlap is at most the rest of span's life
+        for index in range(bisect_left(self.births, span.birth), len(self.spans)):
+            other = self.spans[index]
+            if other.birth > span.death or beaten(span.death - other.birth + bonus):
+                break
+            if other.id != span.id and other.id not in self.alive_ids and (skip is None or not skip(other)):
+                consider(other, min(span.death, other.death) - other.birth)
+
+
+def top_contemporaries(spans, per_person=CONTEMPORARIES_PER_PERSON, only=None):
+    """Yield (person id, [(other id, overlap years), best first]) for each span, or just those in only
+
+    Sweeps lifespans in birth order. People sharing the person's civilization
+    are scanned first in their own sweep; everyone else then only needs to
+    beat that list with the smaller period bonus, so both scans stop after a
+    handful of candidates instead of reading everyone alive at the same time.
+    """
+    spans = sorted(spans, key=lambda span: (span.birth, span.id))
+    everyone = _Sweep(spans)
+    by_civilization = {}
+    for span in spans:
+        if span.civilization_id is not None:
+            by_civilization.setdefault(span.civilization_id, []).append(span)
+    by_civilization = {key: _Sweep(members) for key, members in by_civilization.items()}
+
+    for span in spans:
+        civilization = by_civilization.get(span.civilization_id)
+        everyone.advance(span.birth)
+        if civilization:
+            civilization.advance(span.birth)
+
+        if only is None or span.id in only:
+            best = []  # min-heap of (score, overlap, -other id)
+
+            def consider(other, overlap):
+                entry = (_score(span, other, overlap), overlap, -other.id)
+                if len(best) < per_person:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+
+            def beaten(bound):
+                return len(best) == per_person and bound <= best[0][0]
+
+            if civilization:
+                civilization.scan(span, MAX_BONUS, consider, beaten)
+                everyone.scan(span, SHARED_PERIOD_BONUS, consider, beaten,
+                              skip=lambda other: other.civilization_id == span.civilization_id)
+            else:
+                everyone.scan(span, SHARED_PERIOD_BONUS, consider, beaten)
+
+            yield span.id, [(-other_id, overlap) for score, overlap, other_id in sorted(best, reverse=True)]
+
+        everyone.add(span)
+        if civilization:
+            civilization.add(span)
+
+
+def _spans(people):
+    return [
+        PersonSpan(*row) for row in people.filter(birth_date__isnull=False, death_date__isnull=False).values_list(
+            'id', 'birth_date', 'death_date', 'civilization_id', 'period_id').iterator()
+        if row[2] >= row[1]
+    ]
+
+
+def _rows(results):
+    for person_id, others in results:
+        for rank, (other_id, overlap) in enumerate(others, 1):
+            yield Contemporary(person_id=person_id, other_id=other_id, overlap=overlap, rank=rank)
+
+
+def rebuild_all(per_person=CONTEMPORARIES_PER_PERSON):
+    """Rebuild the contemporaries table for every person"""
+    Contemporary.objects.all().delete()
+    rows = list(_rows(top_contemporaries(_spans(Person.objects.all()), per_person)))
+    Contemporary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _overlapping(people, start, end):
+    return people.filter(birth_date__lte=end, death_date__gte=start)
+
+
+def refresh(person_id, lifespans):
+    """Recompute the lists a change to one person can affect
+
+    lifespans are the person's (birth, death) before and after the change.
+    Anyone alive during them may gain or lose the person, and their own
+    candidates all lived inside the window spanned by their lifespans.
+    """
+    lifespans = [(birth, death) for birth, death in lifespans if birth is not None and death is not None]
+    affected = Q(id=person_id)
+    for birth, death in lifespans:
+        affected |= Q(birth_date__lte=death, death_date__gte=birth)
+    affected = _spans(Person.objects.filter(affected))
+    affected_ids = {span.id for span in affected} | {person_id}
+
+    Contemporary.objects.filter(person_id__in=affected_ids).delete()
+    if not affected:
+        return
+    window_start = min(span.birth for span in affected)
+    window_end = max(span.death for span in affected)
+    spans = _spans(_overlapping(Person.objects.all(), window_start, window_end))
+    Contemporary.objects.bulk_create(_rows(top_contemporaries(spans, only=affected_ids)), batch_size=1000)
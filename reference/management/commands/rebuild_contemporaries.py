@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.indexes import bump_content_version
+from reference import contemporaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the ranked list of contemporaries shown on each person page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-person', type=int, default=contemporaries.CONTEMPORARIES_PER_PERSON,
+                            help='How many contemporaries to keep for each person')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rows = contemporaries.rebuild_all(options['per_person'])
+        transaction.on_commit(bump_content_version)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt contemporaries with {rows} rows'))
@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-18 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference', '0003_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contemporary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('overlap', models.IntegerField()),
+                ('rank', models.IntegerField()),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reference.person')),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contemporaries', to='reference.person')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['person', 'rank'], name='contemporary_person_rank_idx')],
+                'unique_together': {('person', 'other')},
+            },
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
-from core.models import HistoricalPeriod, Civilization
+from core.models import HistoricalPeriod, Civilization, SearchKeyMixin
 
-class Person(models.Model):
+class Person(SearchKeyMixin, models.Model):
     """Historical figures including rulers, generals, philosophers, etc."""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     PERSON_CATEGORIES = [
         ('ruler', 'Ruler/Emperor'),
         ('military', 'General/Military Leader'),
@@ -16,6 +18,8 @@ class Person(models.Model):
 
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     birth_date = models.IntegerField(null=True, blank=True)  # Can be negative for BCE
     death_date = models.IntegerField(null=True, blank=True)  # Can be negative for BCE
     category = models.CharField(max_length=20, choices=PERSON_CATEGORIES)
@@ -26,6 +30,7 @@ class Person(models.Model):
     achievements = models.TextField(blank=True)
     achievements_is = models.TextField(blank=True)  # Icelandic achievements
     image = models.ImageField(upload_to='people/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name_is
@@ -34,10 +39,30 @@ class Person(models.Model):
         verbose_name_plural = "People"
         ordering = ['name_is']
 
-class Deity(models.Model):
+class Contemporary(models.Model):
+    """People whose lifespans overlap a person's, best first; kept up to date by reference.signals"""
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='contemporaries')
+    other = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='+')
+    overlap = models.IntegerField()  # Years both were alive
+    rank = models.IntegerField()  # 1 is the best match
+
+    def __str__(self):
+        return f"{self.person_id} ~ {self.other_id} (#{self.rank})"
+
+    class Meta:
+        unique_together = ('person', 'other')
+        indexes = [
+            models.Index(fields=['person', 'rank'], name='contemporary_person_rank_idx'),
+        ]
+
+class Deity(SearchKeyMixin, models.Model):
     """Gods and deities from various mythologies"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     civilization = models.ForeignKey(Civilization, on_delete=models.SET_NULL, null=True, related_name='deities')
     domain = models.CharField(max_length=100)  # e.g., "God of War", "Goddess of Love"
     domain_is = models.CharField(max_length=100)  # Icelandic domain
@@ -48,6 +73,7 @@ class Deity(models.Model):
     cultural_significance = models.TextField()
     cultural_significance_is = models.TextField()  # Icelandic cultural significance
     image = models.ImageField(upload_to='deities/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name_is
@@ -56,10 +82,14 @@ class Deity(models.Model):
         verbose_name_plural = "Deities"
         ordering = ['name_is']
 
-class Government(models.Model):
+class Government(SearchKeyMixin, models.Model):
     """Types of government and political systems"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     description = models.TextField()
     description_is = models.TextField()  # Icelandic description
     period = models.ForeignKey(HistoricalPeriod, on_delete=models.SET_NULL, null=True, related_name='governments')
@@ -67,14 +97,19 @@ class Government(models.Model):
     examples_is = models.TextField()  # Icelandic examples
     characteristics = models.TextField()
     characteristics_is = models.TextField()  # Icelandic characteristics
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name_is
 
-class MilitaryUnit(models.Model):
+class MilitaryUnit(SearchKeyMixin, models.Model):
     """Military units from different civilizations"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     civilization = models.ForeignKey(Civilization, on_delete=models.SET_NULL, null=True, related_name='military_units')
     period = models.ForeignKey(HistoricalPeriod, on_delete=models.SET_NULL, null=True, related_name='military_units')
     unit_type = models.CharField(max_length=50)  # e.g., infantry, cavalry, naval
@@ -85,14 +120,19 @@ class MilitaryUnit(models.Model):
     tactics = models.TextField()
     tactics_is = models.TextField()  # Icelandic tactics
     image = models.ImageField(upload_to='military_units/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name_is
 
-class Weapon(models.Model):
+class Weapon(SearchKeyMixin, models.Model):
     """Weapons and military equipment"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     weapon_type = models.CharField(max_length=50)  # e.g., sword, spear, bow
     civilization = models.ForeignKey(Civilization, on_delete=models.SET_NULL, null=True, blank=True, related_name='weapons')
     period = models.ForeignKey(HistoricalPeriod, on_delete=models.SET_NULL, null=True, related_name='weapons')
@@ -101,14 +141,19 @@ class Weapon(models.Model):
     usage = models.TextField()
     usage_is = models.TextField()  # Icelandic usage
     image = models.ImageField(upload_to='weapons/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name_is
 
-class Battle(models.Model):
+class Battle(SearchKeyMixin, models.Model):
     """Famous battles throughout history"""
+    search_key_fields = {'name_key': 'name', 'name_is_key': 'name_is'}
+
     name = models.CharField(max_length=100)
     name_is = models.CharField(max_length=100)  # Icelandic name
+    name_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    name_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     date = models.IntegerField()  # Can be negative for BCE
     location = models.CharField(max_length=100)
     period = models.ForeignKey(HistoricalPeriod, on_delete=models.SET_NULL, null=True, related_name='battles')
@@ -121,12 +166,15 @@ class Battle(models.Model):
     significance = models.TextField()
     significance_is = models.TextField()  # Icelandic significance
     image = models.ImageField(upload_to='battles/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name_is
 
-class CulturalTopic(models.Model):
+class CulturalTopic(SearchKeyMixin, models.Model):
     """Topics related to culture and society"""
+    search_key_fields = {'title_key': 'title', 'title_is_key': 'title_is'}
+
     TOPIC_CATEGORIES = [
         ('daily_life', 'Daily Life'),
         ('social_classes', 'Social Classes'),
@@ -140,12 +188,15 @@ class CulturalTopic(models.Model):
 
     title = models.CharField(max_length=100)
     title_is = models.CharField(max_length=100)  # Icelandic title
+    title_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
+    title_is_key = models.CharField(max_length=200, blank=True, editable=False, db_index=True)  # Normalized search key
     category = models.CharField(max_length=20, choices=TOPIC_CATEGORIES)
     civilization = models.ForeignKey(Civilization, on_delete=models.SET_NULL, null=True, blank=True, related_name='cultural_topics')
     period = models.ForeignKey(HistoricalPeriod, on_delete=models.SET_NULL, null=True, related_name='cultural_topics')
     content = models.TextField()
     content_is = models.TextField()  # Icelandic content
     image = models.ImageField(upload_to='cultural_topics/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title_is
@@ -0,0 +1,37 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Person
+from . import contemporaries
+
+CONTEMPORARY_FIELDS = ('birth_date', 'death_date', 'civilization_id', 'period_id')
+
+
+@receiver(pre_save, sender=Person)
+def remember_previous_person(sender, instance, raw=False, **kwargs):
+    """Keep the stored lifespan and grouping of a person so contemporaries can tell what changed"""
+    instance._contemporaries_previous = None
+    if not raw and instance.pk:
+        instance._contemporaries_previous = Person.objects.filter(pk=instance.pk).values_list(
+            *CONTEMPORARY_FIELDS).first()
+
+
+@receiver(post_save, sender=Person)
+def update_contemporaries(sender, instance, created=False, raw=False, **kwargs):
+    """Refresh the contemporaries lists a saved person can affect"""
+    if raw:
+        return
+    previous = getattr(instance, '_contemporaries_previous', None)
+    current = tuple(getattr(instance, field) for field in CONTEMPORARY_FIELDS)
+    if not created and previous == current:
+        return
+    lifespans = [current[:2]]
+    if previous:
+        lifespans.append(previous[:2])
+    contemporaries.refresh(instance.pk, lifespans)
+
+
+@receiver(post_delete, sender=Person)
+def remove_from_contemporaries(sender, instance, **kwargs):
+    """Refresh the contemporaries lists that included a deleted person"""
+    contemporaries.refresh(instance.pk, [(instance.birth_date, instance.death_date)])
@@ -1,3 +1,74 @@
-from django.test import TestCase
+import random
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from . import contemporaries
+from .contemporaries import PersonSpan, _score, top_contemporaries
+from .models import Contemporary, Person
+
+
+class TopContemporariesTests(SimpleTestCase):
+    """The pruned sweep ranks the same scores as comparing every pair"""
+
+    def brute_force(self, spans, span, per_person):
+        scores = sorted(
+            (_score(span, other, min(span.death, other.death) - max(span.birth, other.birth))
+             for other in spans
+             if other.id != span.id and other.birth <= span.death and other.death >= span.birth),
+            reverse=True,
+        )
+        return scores[:per_person]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        for trial in range(100):
+            spans = []
+            for person_id in range(rng.randint(1, 40)):
+                birth = rng.randint(-200, 200)
+                spans.append(PersonSpan(person_id, birth, birth + rng.randint(0, 70),
+                                        rng.choice([None, 1, 2]), rng.choice([None, 1, 2])))
+            by_id = {span.id: span for span in spans}
+            per_person = rng.randint(1, 5)
+            for person_id, others in top_contemporaries(spans, per_person):
+                span = by_id[person_id]
+                scores = [_score(span, by_id[other_id], overlap) for other_id, overlap in others]
+                self.assertEqual(scores, self.brute_force(spans, span, per_person))
+
+    def test_only(self):
+        spans = [PersonSpan(1, 0, 50, None, None), PersonSpan(2, 10, 20, None, None), PersonSpan(3, 60, 70, None, None)]
+        self.assertEqual(list(top_contemporaries(spans, only={1, 3})), [(1, [(2, 10)]), (3, [])])
+
+
+class ContemporarySignalTests(TestCase):
+    """Saving or deleting a person keeps the precomputed lists current"""
+
+    def person(self, name, birth, death):
+        return Person.objects.create(name=name, name_is=name, birth_date=birth, death_date=death,
+                                     category='other', biography='', biography_is='')
+
+    def ranked(self, person):
+        return list(person.contemporaries.order_by('rank').values_list('other__name', flat=True))
+
+    def assertTableCurrent(self):
+        current = set(Contemporary.objects.values_list('person_id', 'other_id', 'overlap', 'rank'))
+        contemporaries.rebuild_all()
+        self.assertEqual(current, set(Contemporary.objects.values_list('person_id', 'other_id', 'overlap', 'rank')))
+
+    def test_signals(self):
+        socrates = self.person('Socrates', -470, -399)
+        plato = self.person('Plato', -428, -348)
+        aristotle = self.person('Aristotle', -384, -322)
+        self.assertEqual(self.ranked(socrates), ['Plato'])
+        self.assertEqual(self.ranked(plato), ['Aristotle', 'Socrates'])
+        self.assertEqual(self.ranked(aristotle), ['Plato'])
+        self.assertTableCurrent()
+
+        aristotle.birth_date, aristotle.death_date = -100, -50
+        aristotle.save()
+        self.assertEqual(self.ranked(plato), ['Socrates'])
+        self.assertEqual(self.ranked(aristotle), [])
+        self.assertTableCurrent()
+
+        plato.delete()
+        self.assertEqual(self.ranked(socrates), [])
+        self.assertTableCurrent()
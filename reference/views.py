@@ -4,8 +4,10 @@ from .models import (
     Weapon, Battle, CulturalTopic
 )
 from core.models import HistoricalPeriod, Civilization
+from core.cache import cache_public_page, conditional_object_page
 
 # Reference Home
+@cache_public_page
 def reference_home(request):
     """Main reference section landing page - Hver-er-hver section"""
     # Get all civilizations
@@ -57,6 +59,7 @@ def reference_home(request):
     return render(request, 'reference/reference_home.html', context)
 
 # People & Names views
+@cache_public_page
 def people_list(request):
     """List of historical people"""
     people = Person.objects.all().order_by('name_is')
@@ -72,6 +75,10 @@ def people_list(request):
     }
     return render(request, 'reference/people_list.html', context)
 
+CONTEMPORARIES_SHOWN = 5
+
+@conditional_object_page(Person, 'person_id')
+@cache_public_page
 def person_detail(request, person_id):
     """Detailed view of a single person"""
     person = get_object_or_404(Person, id=person_id)
@@ -79,12 +86,17 @@ def person_detail(request, person_id):
     # Get battles this person commanded
     battles = person.battles.all()
 
+    # Precomputed by reference.contemporaries
+    contemporaries = person.contemporaries.select_related('other').order_by('rank')[:CONTEMPORARIES_SHOWN]
+
     context = {
         'person': person,
         'battles': battles,
+        'contemporaries': contemporaries,
     }
     return render(request, 'reference/person_detail.html', context)
 
+@cache_public_page
 def people_by_category(request, category):
     """List of people filtered by category"""
     people = Person.objects.filter(category=category).order_by('name_is')
@@ -98,6 +110,7 @@ def people_by_category(request, category):
     return render(request, 'reference/people_by_category.html', context)
 
 # Gods & Deities views
+@cache_public_page
 def deities_list(request):
     """List of deities from various mythologies"""
     deities = Deity.objects.all().order_by('name_is')
@@ -109,6 +122,8 @@ def deities_list(request):
     }
     return render(request, 'reference/deities_list.html', context)
 
+@conditional_object_page(Deity, 'deity_id')
+@cache_public_page
 def deity_detail(request, deity_id):
     """Detailed view of a single deity"""
     deity = get_object_or_404(Deity, id=deity_id)
@@ -118,6 +133,7 @@ def deity_detail(request, deity_id):
     }
     return render(request, 'reference/deity_detail.html', context)
 
+@cache_public_page
 def deities_by_civilization(request, civilization):
     """List of deities filtered by civilization"""
     civilization_obj = get_object_or_404(Civilization, id=civilization)
@@ -130,6 +146,7 @@ def deities_by_civilization(request, civilization):
     return render(request, 'reference/deities_by_civilization.html', context)
 
 # Government Types views
+@cache_public_page
 def governments_list(request):
     """List of government types"""
     governments = Government.objects.all().order_by('name_is')
@@ -141,6 +158,8 @@ def governments_list(request):
     }
     return render(request, 'reference/governments_list.html', context)
 
+@conditional_object_page(Government, 'government_id')
+@cache_public_page
 def government_detail(request, government_id):
     """Detailed view of a single government type"""
     government = get_object_or_404(Government, id=government_id)
@@ -151,6 +170,7 @@ def government_detail(request, government_id):
     return render(request, 'reference/government_detail.html', context)
 
 # Military & Warfare views
+@cache_public_page
 def military_home(request):
     """Military & Warfare section landing page"""
     context = {
@@ -160,6 +180,7 @@ def military_home(request):
     }
     return render(request, 'reference/military_home.html', context)
 
+@cache_public_page
 def military_units(request):
     """List of military units"""
     units = MilitaryUnit.objects.all().order_by('name_is')
@@ -173,6 +194,7 @@ def military_units(request):
     }
     return render(request, 'reference/military_units.html', context)
 
+@cache_public_page
 def military_weapons(request):
     """List of weapons and military equipment"""
     weapons = Weapon.objects.all().order_by('name_is')
@@ -186,6 +208,7 @@ def military_weapons(request):
     }
     return render(request, 'reference/military_weapons.html', context)
 
+@cache_public_page
 def battles_list(request):
     """List of famous battles"""
     battles = Battle.objects.all().order_by('date')
@@ -197,6 +220,8 @@ def battles_list(request):
     }
     return render(request, 'reference/battles_list.html', context)
 
+@conditional_object_page(Battle, 'battle_id')
+@cache_public_page
 def battle_detail(request, battle_id):
     """Detailed view of a single battle"""
     battle = get_object_or_404(Battle, id=battle_id)
@@ -207,6 +232,7 @@ def battle_detail(request, battle_id):
     return render(request, 'reference/battle_detail.html', context)
 
 # Culture & Society views
+@cache_public_page
 def culture_home(request):
     """Culture & Society section landing page"""
     daily_life = CulturalTopic.objects.filter(category='daily_life').count()
@@ -224,6 +250,7 @@ def culture_home(request):
     }
     return render(request, 'reference/culture_home.html', context)
 
+@cache_public_page
 def daily_life(request):
     """Daily life topics"""
     topics = CulturalTopic.objects.filter(category='daily_life').order_by('title_is')
@@ -239,6 +266,7 @@ def daily_life(request):
     }
     return render(request, 'reference/cultural_topics.html', context)
 
+@cache_public_page
 def social_classes(request):
     """Social classes topics"""
     topics = CulturalTopic.objects.filter(category='social_classes').order_by('title_is')
@@ -254,6 +282,7 @@ def social_classes(request):
     }
     return render(request, 'reference/cultural_topics.html', context)
 
+@cache_public_page
 def trade(request):
     """Trade & Commerce topics"""
     topics = CulturalTopic.objects.filter(category='trade').order_by('title_is')
@@ -269,6 +298,7 @@ def trade(request):
     }
     return render(request, 'reference/cultural_topics.html', context)
 
+@cache_public_page
 def art(request):
     """Art & Architecture topics"""
     topics = CulturalTopic.objects.filter(category='art').order_by('title_is')
@@ -284,6 +314,7 @@ def art(request):
     }
     return render(request, 'reference/cultural_topics.html', context)
 
+@cache_public_page
 def literature(request):
     """Literature & Writing topics"""
     topics = CulturalTopic.objects.filter(category='literature').order_by('title_is')
@@ -17,4 +17,28 @@ python manage.py populate_roman_content
 echo Populating Middle Ages content...
 python manage.py populate_middle_ages_content
 
+echo Backfilling search keys...
+python manage.py backfill_search_keys
+
+echo Rebuilding search index...
+python manage.py rebuild_search_index
+
+echo Rebuilding quiz progress rollups...
+python manage.py rebuild_quiz_progress
+
+echo Rebuilding event histogram...
+python manage.py rebuild_event_histogram
+
+echo Rebuilding causal closure...
+python manage.py rebuild_causal_closure
+
+echo Deriving concurrent events...
+python manage.py derive_concurrent_events
+
+echo Ranking contemporaries...
+python manage.py rebuild_contemporaries
+
+echo Building map tiles...
+python manage.py build_map_tiles
+
 echo Database population complete!
\ No newline at end of file
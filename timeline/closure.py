@@ -0,0 +1,123 @@
+from .graph import build_effects_subgraph, build_graph, causal_edge
+from .models import CausalClosure
+
+
+def _ancestors(event_id):
+    """{ancestor id: depth} of event_id, including itself at depth 0"""
+    depths = dict(CausalClosure.objects.filter(descendant_id=event_id).values_list('ancestor_id', 'depth'))
+    depths[event_id] = 0
+    return depths
+
+
+def _descendants(event_id):
+    """{descendant id: depth} of event_id, including itself at depth 0"""
+    depths = dict(CausalClosure.objects.filter(ancestor_id=event_id).values_list('descendant_id', 'depth'))
+    depths[event_id] = 0
+    return depths
+
+
+def add_edge(cause_id, effect_id):
+    """Extend the closure with a new cause -> effect edge
+
+    Every ancestor of the cause now reaches every descendant of the effect,
+    and existing pairs keep whichever chain is shorter.
+    """
+    ancestors = _ancestors(cause_id)
+    descendants = _descendants(effect_id)
+    existing = {
+        (row.ancestor_id, row.descendant_id): row
+        for row in CausalClosure.objects.filter(ancestor_id__in=ancestors, descendant_id__in=descendants)
+    }
+    created = []
+    shortened = []
+    for ancestor_id, ancestor_depth in ancestors.items():
+        for descendant_id, descendant_depth in descendants.items():
+            if ancestor_id == descendant_id:
+                continue
+            depth = ancestor_depth + 1 + descendant_depth
+            row = existing.get((ancestor_id, descendant_id))
+            if row is None:
+                created.append(CausalClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth))
+            elif depth < row.depth:
+                row.depth = depth
+                shortened.append(row)
+    CausalClosure.objects.bulk_create(created, batch_size=1000)
+    CausalClosure.objects.bulk_update(shortened, ['depth'], batch_size=1000)
+
+
+def recompute(ancestor_ids):
+    """Bring the rows of the given ancestors in line with the relations reachable from them
+
+    Only the reachable part of the relation graph is loaded, and only rows
+    that changed are written.
+    """
+    ancestor_ids = list(ancestor_ids)
+    if not ancestor_ids:
+        return
+    graph = build_effects_subgraph(ancestor_ids)
+    existing = {}
+    for row in CausalClosure.objects.filter(ancestor_id__in=ancestor_ids):
+        existing[(row.ancestor_id, row.descendant_id)] = row
+
+    created = []
+    changed = []
+    for ancestor_id in ancestor_ids:
+        for descendant_id, depth in graph.traverse(ancestor_id, 'effects').items():
+            row = existing.pop((ancestor_id, descendant_id), None)
+            if row is None:
+                created.append(CausalClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth))
+            elif row.depth != depth:
+                row.depth = depth
+                changed.append(row)
+    stale = [row.pk for row in existing.values()]
+    for start in range(0, len(stale), 1000):
+        CausalClosure.objects.filter(pk__in=stale[start:start + 1000]).delete()
+    CausalClosure.objects.bulk_update(changed, ['depth'], batch_size=1000)
+    CausalClosure.objects.bulk_create(created, batch_size=1000)
+
+
+def remove_edge(cause_id, effect_id):
+    """Recompute the rows that may have depended on a removed cause -> effect edge
+
+    Only the cause and its ancestors can lose descendants.
+    """
+    recompute(_ancestors(cause_id))
+
+
+def event_ancestors(event_id):
+    """Ids of the events whose rows must be recomputed once event_id is deleted"""
+    return [ancestor_id for ancestor_id in _ancestors(event_id) if ancestor_id != event_id]
+
+
+def record_relation(relation, previous=None):
+    """Apply a saved relation; previous is its (from_event_id, to_event_id, relation_type) before the save"""
+    edge = causal_edge(relation.from_event_id, relation.to_event_id, relation.relation_type)
+    old_edge = causal_edge(*previous) if previous else None
+    if edge == old_edge:
+        return
+    if old_edge:
+        remove_edge(*old_edge)
+    if edge:
+        add_edge(*edge)
+
+
+def forget_relation(relation):
+    """Remove a deleted relation from the closure"""
+    edge = causal_edge(relation.from_event_id, relation.to_event_id, relation.relation_type)
+    if edge:
+        remove_edge(*edge)
+
+
+def rebuild_all():
+    """Rebuild the closure from the relation table"""
+    CausalClosure.objects.all().delete()
+    graph = build_graph()
+    rows = 0
+    for ancestor_id in list(graph.effects):
+        closure = [
+            CausalClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+            for descendant_id, depth in graph.traverse(ancestor_id, 'effects').items()
+        ]
+        CausalClosure.objects.bulk_create(closure, batch_size=1000)
+        rows += len(closure)
+    return rows
@@ -0,0 +1,153 @@
+import heapq
+import math
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+
+from core.geo import EARTH_RADIUS_KM, distance_km
+
+from .models import ConcurrentEvent, TimelineEvent
+
+EventSpan = namedtuple('EventSpan', 'id start stop importance civilization_id latitude longitude')
+
+
+class _RegionGrid:
+    """Latitude / longitude cells at least max_distance wide
+
+    Anything within max_distance of a point lies in the cells nearby(point)
+    returns, so the sweep never reads events in far away cells. Without a
+    max_distance everything shares one cell.
+    """
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        if max_distance is not None:
+            self.angle = max_distance / EARTH_RADIUS_KM
+            self.size = math.degrees(self.angle)
+            self.columns = max(int(360 // self.size), 1)
+            self.width = 360 / self.columns
+
+    def contains(self, span):
+        return self.max_distance is None or None not in (span.latitude, span.longitude)
+
+    def _column(self, longitude):
+        return math.floor((longitude + 180) / self.width)
+
+    def cell(self, span):
+        if self.max_distance is None:
+            return None
+        return math.floor((span.latitude + 90) / self.size), self._column(span.longitude) % self.columns
+
+    def nearby(self, span):
+        if self.max_distance is None:
+            return [None]
+        row, _ = self.cell(span)
+        cos_latitude = math.cos(math.radians(span.latitude))
+        if self.angle >= math.pi / 2 or math.sin(self.angle) >= cos_latitude:
+            # The circle reaches over a pole and covers every longitude
+            columns = range(self.columns)
+        else:
+            # Widest longitude difference of a point within max_distance
+            spread = math.degrees(math.asin(math.sin(self.angle) / cos_latitude)) + 1e-9
+            first, last = self._column(span.longitude - spread), self._column(span.longitude + spread)
+            columns = range(self.columns) if last - first + 1 >= self.columns else {
+                column % self.columns for column in range(first, last + 1)}
+        return [(row + offset, column) for offset in (-1, 0, 1) for column in columns]
+
+
+def _running_at(span, running):
+    """Spans still running when span starts, latest start first"""
+    for other in reversed(running.values()):
+        yield span.start - other.start, 0, -other.id, other
+
+
+def _starting_during(span, starting, starts, running):
+    """Spans starting while span runs, earliest first"""
+    first = bisect_left(starts, span.start)
+    last = bisect_left(starts, span.stop + 1)
+    for index in range(first, last):
+        other = starting[index]
+        if other.id not in running:
+            yield other.start - span.start, 1, other.id, other
+
+
+def concurrent_events(spans, per_event, max_distance=None):
+    """Yield (event id, [concurrent event ids, best first]) for every span
+
+    Concurrent events overlap in time and belong to another civilization
+    (optionally within max_distance km). They rank by importance, then by how
+    close their start is. A sweep in start order keeps the events still running
+    per importance level, while start-sorted arrays per level give the events
+    starting during a span. Each event then only reads its best candidates
+    instead of comparing against every other event. Events that can never
+    qualify (no civilization, or no location when max_distance is set) are
+    left out of both, and the rest are bucketed by _RegionGrid cell so events
+    too far away are never read.
+    """
+    spans = sorted(spans, key=lambda span: (span.start, span.id))
+    grid = _RegionGrid(max_distance)
+    levels = sorted({span.importance for span in spans}, reverse=True)
+    starting = defaultdict(list)  # (level, cell) -> candidate spans in start order
+    for span in spans:
+        if span.civilization_id is not None and grid.contains(span):
+            starting[span.importance, grid.cell(span)].append(span)
+    starts = {key: [span.start for span in group] for key, group in starting.items()}
+    running = {key: {} for key in starting}  # id -> span, in start order
+    ending = []  # (stop, id, key) heap of running spans
+
+    for span in spans:
+        while ending and ending[0][0] < span.start:
+            _, span_id, key = heapq.heappop(ending)
+            del running[key][span_id]
+
+        found = []
+        if span.civilization_id is None or not grid.contains(span):
+            yield span.id, found
+            continue
+
+        def eligible(other):
+            return (other.id != span.id and other.civilization_id != span.civilization_id
+                    and (max_distance is None or distance_km(
+                        span.latitude, span.longitude, other.latitude, other.longitude) <= max_distance))
+
+        cells = grid.nearby(span)
+        for level in levels:
+            if len(found) == per_event:
+                break
+            candidates = []
+            for cell in cells:
+                key = level, cell
+                if key not in starting:
+                    continue
+                candidates.append(_running_at(span, running[key]))
+                candidates.append(_starting_during(span, starting[key], starts[key], running[key]))
+            # (gap, running first, id) never ties, so the spans themselves are never compared
+            for *_, other in heapq.merge(*candidates):
+                if eligible(other):
+                    found.append(other.id)
+                    if len(found) == per_event:
+                        break
+        yield span.id, found
+
+        key = span.importance, grid.cell(span)
+        running[key][span.id] = span
+        heapq.heappush(ending, (span.stop, span.id, key))
+
+
+def rebuild_all(per_event, max_distance=None, batch_size=1000):
+    """Replace the ConcurrentEvent table with freshly derived rows"""
+    ConcurrentEvent.objects.all().delete()
+    spans = [EventSpan(*row) for row in TimelineEvent.objects.values_list(
+        'id', 'date_start', 'date_stop', 'importance', 'civilization_id', 'latitude', 'longitude').iterator()]
+    batch = []
+    rows = 0
+    for event_id, others in concurrent_events(spans, per_event, max_distance):
+        batch.extend(
+            ConcurrentEvent(event_id=event_id, other_id=other_id, rank=rank)
+            for rank, other_id in enumerate(others, 1)
+        )
+        if len(batch) >= batch_size:
+            ConcurrentEvent.objects.bulk_create(batch)
+            rows += len(batch)
+            batch = []
+    ConcurrentEvent.objects.bulk_create(batch)
+    return rows + len(batch)
@@ -0,0 +1,117 @@
+from collections import defaultdict, deque
+
+from django.db.models import Q
+
+from core.indexes import ContentIndex
+
+from .models import TimelineRelation
+
+# How a relation reads from the other event's side
+INVERSE_RELATION_TYPES = {
+    'cause': 'effect',
+    'effect': 'cause',
+    'related': 'related',
+    'concurrent': 'concurrent',
+}
+
+
+def causal_edge(from_event_id, to_event_id, relation_type):
+    """(cause, effect) event ids for a relation, or None for non-causal relations
+
+    A 'cause' relation lists a cause of from_event, an 'effect' relation one of
+    its consequences.
+    """
+    if relation_type == 'cause':
+        return to_event_id, from_event_id
+    if relation_type == 'effect':
+        return from_event_id, to_event_id
+    return None
+
+
+class RelationGraph:
+    """Cause/effect adjacency over TimelineRelation in both directions"""
+
+    def __init__(self, relations):
+        self.effects = defaultdict(set)  # cause id -> direct effect ids
+        self.causes = defaultdict(set)  # effect id -> direct cause ids
+        for from_event_id, to_event_id, relation_type in relations:
+            edge = causal_edge(from_event_id, to_event_id, relation_type)
+            if edge:
+                cause, effect = edge
+                self.effects[cause].add(effect)
+                self.causes[effect].add(cause)
+
+    def _edges(self, direction):
+        return self.causes if direction == 'causes' else self.effects
+
+    def traverse(self, event_id, direction, max_depth=None):
+        """{event id: depth} of transitive causes or effects up to max_depth hops (None for no limit)"""
+        edges = self._edges(direction)
+        depths = {event_id: 0}
+        queue = deque([event_id])
+        while queue:
+            current = queue.popleft()
+            if max_depth is not None and depths[current] == max_depth:
+                continue
+            for other in edges.get(current, ()):
+                if other not in depths:
+                    depths[other] = depths[current] + 1
+                    queue.append(other)
+        del depths[event_id]
+        return depths
+
+    def shortest_path(self, source_id, target_id):
+        """Fewest-hop chain of event ids leading from cause source_id to effect target_id, or None"""
+        previous = {source_id: None}
+        queue = deque([source_id])
+        while queue:
+            current = queue.popleft()
+            if current == target_id:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return path[::-1]
+            for other in self.effects.get(current, ()):
+                if other not in previous:
+                    previous[other] = current
+                    queue.append(other)
+        return None
+
+
+def build_graph():
+    return RelationGraph(TimelineRelation.objects.values_list('from_event_id', 'to_event_id', 'relation_type'))
+
+
+# Frontier events per relation query when loading a subgraph
+SUBGRAPH_BATCH_SIZE = 500
+
+
+def build_effects_subgraph(event_ids):
+    """RelationGraph of only the cause -> effect edges reachable from event_ids
+
+    Walks outwards one hop per round, reading just the relations leaving the
+    current frontier, so the cost follows the size of the reachable part
+    rather than the whole relation table.
+    """
+    relations = []
+    seen = set(event_ids)
+    frontier = sorted(seen)
+    while frontier:
+        next_frontier = []
+        for start in range(0, len(frontier), SUBGRAPH_BATCH_SIZE):
+            batch = frontier[start:start + SUBGRAPH_BATCH_SIZE]
+            rows = TimelineRelation.objects.filter(
+                Q(from_event_id__in=batch, relation_type='effect') | Q(to_event_id__in=batch, relation_type='cause')
+            ).values_list('from_event_id', 'to_event_id', 'relation_type')
+            for row in rows:
+                relations.append(row)
+                cause, effect = causal_edge(*row)
+                if effect not in seen:
+                    seen.add(effect)
+                    next_frontier.append(effect)
+        frontier = next_frontier
+    return RelationGraph(relations)
+
+
+relation_graph = ContentIndex('relation-graph', build_graph)
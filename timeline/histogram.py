@@ -0,0 +1,93 @@
+from collections import Counter
+
+from django.db.models import Count, F
+
+from .models import EventHistogram, TimelineEvent
+
+
+def bucket_for(year, resolution):
+    """First year of the bucket holding year"""
+    size = EventHistogram.BUCKET_SIZES[resolution]
+    return year // size * size
+
+
+def _keys(date_start, category, civilization_id):
+    for resolution in EventHistogram.BUCKET_SIZES:
+        yield resolution, bucket_for(date_start, resolution), category, civilization_id
+
+
+def _add(key, amount):
+    resolution, bucket, category, civilization_id = key
+    rows = EventHistogram.objects.filter(
+        resolution=resolution, bucket=bucket, category=category, civilization_id=civilization_id)
+    if amount > 0 and not rows.exists():
+        EventHistogram.objects.create(
+            resolution=resolution, bucket=bucket, category=category, civilization_id=civilization_id,
+            count=amount)
+        return
+    rows.update(count=F('count') + amount)
+    if amount < 0:
+        rows.filter(count__lte=0).delete()
+
+
+def record_event(event, previous=None):
+    """Apply a saved event to the histogram; previous is its (date_start, category, civilization_id) before the save"""
+    current = (event.date_start, event.category, event.civilization_id)
+    if previous == current:
+        return
+    if previous:
+        for key in _keys(*previous):
+            _add(key, -1)
+    for key in _keys(*current):
+        _add(key, 1)
+
+
+def forget_event(event):
+    """Remove a deleted event from the histogram"""
+    for key in _keys(event.date_start, event.category, event.civilization_id):
+        _add(key, -1)
+
+
+def fold_civilization(civilization_id):
+    """Move a civilization's counts onto the rows without one
+
+    Deleting a civilization leaves its events in place with no civilization
+    (a bulk update that sends no signals) while its own rows cascade away.
+    """
+    rows = list(EventHistogram.objects.filter(civilization_id=civilization_id))
+    keys = {(row.resolution, row.bucket, row.category): row.count for row in rows}
+    unassigned = {
+        (row.resolution, row.bucket, row.category): row
+        for row in EventHistogram.objects.filter(civilization__isnull=True, bucket__in={row.bucket for row in rows})
+    }
+    updated = []
+    created = []
+    for (resolution, bucket, category), count in keys.items():
+        row = unassigned.get((resolution, bucket, category))
+        if row is None:
+            created.append(EventHistogram(resolution=resolution, bucket=bucket, category=category, count=count))
+        else:
+            row.count += count
+            updated.append(row)
+    EventHistogram.objects.bulk_update(updated, ['count'], batch_size=1000)
+    EventHistogram.objects.bulk_create(created, batch_size=1000)
+    EventHistogram.objects.filter(civilization_id=civilization_id).delete()
+
+
+def rebuild_all():
+    """Rebuild the histogram from the event table"""
+    EventHistogram.objects.all().delete()
+
+    counts = Counter()
+    rows = TimelineEvent.objects.order_by().values('date_start', 'category', 'civilization_id').annotate(
+        events=Count('id'))
+    for row in rows.iterator():
+        for key in _keys(row['date_start'], row['category'], row['civilization_id']):
+            counts[key] += row['events']
+
+    EventHistogram.objects.bulk_create([
+        EventHistogram(resolution=resolution, bucket=bucket, category=category,
+                       civilization_id=civilization_id, count=count)
+        for (resolution, bucket, category, civilization_id), count in counts.items()
+    ], batch_size=1000)
+    return len(counts)
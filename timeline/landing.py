@@ -0,0 +1,30 @@
+from core.indexes import ContentIndex
+from core.models import Civilization
+
+from .models import TimelineEvent
+
+# Events shown per civilization on the timeline landing page
+EVENTS_PER_CIVILIZATION = 20
+
+
+def build_initial_events():
+    """Ids of up to EVENTS_PER_CIVILIZATION earliest events per civilization (and without one), in timeline order
+
+    Each slice is a short range scan of event_civ_start_idx. Numbering the
+    whole event table with a window function instead was several times slower.
+    """
+    rows = []
+    for civilization_id in [*Civilization.objects.values_list('id', flat=True), None]:
+        rows.extend(TimelineEvent.objects.filter(civilization_id=civilization_id).order_by(
+            'date_start', 'id').values_list('date_start', 'id')[:EVENTS_PER_CIVILIZATION])
+    return [event_id for date_start, event_id in sorted(rows)]
+
+
+initial_events = ContentIndex('timeline_initial_events', build_initial_events)
+
+
+def initial_timeline_events():
+    """The landing page's events with a single primary key lookup"""
+    ids = initial_events.get()
+    events = TimelineEvent.objects.in_bulk(ids)
+    return [events[pk] for pk in ids if pk in events]
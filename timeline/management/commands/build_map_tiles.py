@@ -0,0 +1,110 @@
+import hashlib
+import json
+import math
+import shutil
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.geo import tile_position
+from timeline.models import TimelineEvent
+from timeline.views import MAP_CELLS_PER_TILE
+
+# Bump when the tile format changes so clients never mix old and new tiles
+TILE_FORMAT = 1
+
+
+class Command(BaseCommand):
+    help = 'Renders geolocated timeline events into a static JSON tile pyramid served by WhiteNoise'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-zoom', type=int, default=8,
+                            help='Deepest zoom level to render; the live map API covers deeper zooms')
+        parser.add_argument('--output', default=str(Path(settings.STATIC_ROOT) / 'map-tiles'))
+        parser.add_argument('--keep', type=int, default=2, help='Number of tile versions to keep')
+        parser.add_argument('--force', action='store_true', help='Rebuild even if this version exists')
+
+    def handle(self, *args, **options):
+        output = Path(options['output'])
+        max_zoom = options['max_zoom']
+        events = list(TimelineEvent.objects.filter(latitude__isnull=False, longitude__isnull=False).order_by(
+            'id').values_list('id', 'latitude', 'longitude', 'period_id', 'category'))
+
+        # Tiles live under a directory named after their content, so they can be cached forever
+        digest = hashlib.md5(json.dumps([TILE_FORMAT, max_zoom, MAP_CELLS_PER_TILE, events]).encode())
+        version = digest.hexdigest()[:16]
+        target = output / version
+
+        if target.exists() and not options['force']:
+            self.stdout.write(f'Map tiles {version} are up to date')
+        else:
+            if target.exists():
+                shutil.rmtree(target)
+            tiles = 0
+            for zoom in range(max_zoom + 1):
+                tiles += self.write_zoom(target, zoom, events)
+            self.stdout.write(f'Wrote {tiles} tiles for {len(events)} events')
+
+        self.write_index(output, version, max_zoom, events)
+        self.prune(output, version, options['keep'])
+        self.stdout.write(self.style.SUCCESS(f'Map tiles {version} ready in {output}'))
+
+    def layers(self, period_id, category):
+        """Every (period, category) layer an event belongs to, 'all' meaning unfiltered"""
+        for period in ('all', period_id):
+            if period is None:
+                continue
+            for layer_category in ('all', category):
+                yield str(period), layer_category
+
+    def write_zoom(self, target, zoom, events):
+        """Cluster events into a grid of cells per tile and write one file per non-empty tile"""
+        tiles = defaultdict(dict)
+        for event_id, latitude, longitude, period_id, category in events:
+            x, y = tile_position(latitude, longitude, zoom)
+            tile = (math.floor(x), math.floor(y))
+            cell = (math.floor(x * MAP_CELLS_PER_TILE), math.floor(y * MAP_CELLS_PER_TILE))
+            for layer in self.layers(period_id, category):
+                cells = tiles[(layer, tile)]
+                cluster = cells.get(cell)
+                if cluster is None:
+                    cells[cell] = [latitude, longitude, 1, event_id]
+                else:
+                    cluster[0] += latitude
+                    cluster[1] += longitude
+                    cluster[2] += 1
+                    cluster[3] = min(cluster[3], event_id)
+
+        for ((period, category), (x, y)), cells in tiles.items():
+            clusters = [
+                [round(lat / count, 5), round(lng / count, 5), count, event_id if count == 1 else None]
+                for lat, lng, count, event_id in cells.values()
+            ]
+            path = target / period / category / str(zoom) / str(x) / f'{y}.json'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps({'clusters': clusters}, separators=(',', ':')))
+        return len(tiles)
+
+    def write_index(self, output, version, max_zoom, events):
+        """index.json is the only file that changes name-stably, so clients fetch it first"""
+        index = {
+            'version': version,
+            'url': f'{settings.STATIC_URL}map-tiles/{version}/{{period}}/{{category}}/{{z}}/{{x}}/{{y}}.json',
+            'max_zoom': max_zoom,
+            'cells_per_tile': MAP_CELLS_PER_TILE,
+            'periods': sorted({period_id for _, _, _, period_id, _ in events if period_id is not None}),
+            'categories': sorted({category for _, _, _, _, category in events}),
+        }
+        output.mkdir(parents=True, exist_ok=True)
+        (output / 'index.json').write_text(json.dumps(index, indent=2))
+
+    def prune(self, output, version, keep):
+        """Remove old tile versions, newest kept first"""
+        versions = sorted(
+            (path for path in output.iterdir() if path.is_dir() and path.name != version),
+            key=lambda path: path.stat().st_mtime, reverse=True,
+        )
+        for path in versions[max(keep - 1, 0):]:
+            shutil.rmtree(path)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.indexes import bump_content_version
+from timeline import concurrency
+
+
+class Command(BaseCommand):
+    help = 'Derives "meanwhile elsewhere" events from other civilizations that overlap each event in time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-event', type=int, default=10, help='Concurrent events kept per event')
+        parser.add_argument('--max-distance', type=float,
+                            help='Only pair events located within this many kilometres of each other')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rows = concurrency.rebuild_all(options['per_event'], options['max_distance'])
+        transaction.on_commit(bump_content_version)
+        self.stdout.write(self.style.SUCCESS(f'Derived {rows} concurrent events'))
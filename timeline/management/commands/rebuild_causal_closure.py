@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.indexes import bump_content_version
+from timeline import closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the cause/effect closure table from the timeline relations'
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        rows = closure.rebuild_all()
+        transaction.on_commit(bump_content_version)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt causal closure with {rows} rows'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.indexes import bump_content_version
+from timeline import histogram
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the zoom-level event histogram from the timeline events'
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        buckets = histogram.rebuild_all()
+        transaction.on_commit(bump_content_version)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt event histogram with {buckets} buckets'))
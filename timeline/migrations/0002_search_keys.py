@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineevent',
+            name='title_is_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=400),
+        ),
+        migrations.AddField(
+            model_name='timelineevent',
+            name='title_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=400),
+        ),
+    ]
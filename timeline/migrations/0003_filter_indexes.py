@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_note_user_type_index'),
+        ('timeline', '0002_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['date_start', 'id'], name='event_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['period', 'date_start', 'id'], name='event_period_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['civilization', 'date_start', 'id'], name='event_civ_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['category', 'date_start', 'id'], name='event_category_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['importance', 'date_start', 'id'], name='event_importance_start_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+MAX_SPAN_LEVEL = 16
+
+
+def fill_spans(apps, schema_editor):
+    TimelineEvent = apps.get_model('timeline', 'TimelineEvent')
+    events = []
+    for event in TimelineEvent.objects.only('date_start', 'date_end').iterator():
+        if event.date_end is not None and event.date_end > event.date_start:
+            event.date_stop = event.date_end
+        else:
+            event.date_stop = event.date_start
+        event.span_level = min((event.date_stop - event.date_start).bit_length(), MAX_SPAN_LEVEL)
+        events.append(event)
+    TimelineEvent.objects.bulk_update(events, ['date_stop', 'span_level'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_note_user_type_index'),
+        ('timeline', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineevent',
+            name='date_stop',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='timelineevent',
+            name='span_level',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_spans, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['span_level', 'date_start'], name='event_span_start_idx'),
+        ),
+    ]
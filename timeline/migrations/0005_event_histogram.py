@@ -0,0 +1,29 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_note_user_type_index'),
+        ('timeline', '0004_event_spans'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('year', 'Year'), ('decade', 'Decade'), ('century', 'Century'), ('millennium', 'Millennium')], max_length=10)),
+                ('bucket', models.IntegerField()),
+                ('category', models.CharField(choices=[('political', 'Political'), ('military', 'Military'), ('cultural', 'Cultural'), ('religious', 'Religious'), ('scientific', 'Scientific'), ('economic', 'Economic'), ('other', 'Other')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('civilization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.civilization')),
+            ],
+            options={
+                'unique_together': {('resolution', 'bucket', 'category', 'civilization')},
+            },
+        ),
+    ]
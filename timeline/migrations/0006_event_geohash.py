@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+from core.geo import encode_geohash
+
+
+def fill_geohashes(apps, schema_editor):
+    TimelineEvent = apps.get_model('timeline', 'TimelineEvent')
+    events = []
+    for event in TimelineEvent.objects.filter(latitude__isnull=False, longitude__isnull=False).only(
+            'latitude', 'longitude').iterator():
+        event.geohash = encode_geohash(event.latitude, event.longitude)
+        events.append(event)
+    TimelineEvent.objects.bulk_update(events, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline', '0005_event_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineevent',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-18 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline', '0006_event_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CausalClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.IntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='timeline.timelineevent')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='timeline.timelineevent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ancestor', 'depth'], name='closure_ancestor_depth_idx'), models.Index(fields=['descendant', 'depth'], name='closure_descendant_depth_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline', '0007_causal_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConcurrentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='concurrent_events', to='timeline.timelineevent')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='timeline.timelineevent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'rank'], name='concurrent_event_rank_idx')],
+                'unique_together': {('event', 'other')},
+            },
+        ),
+    ]
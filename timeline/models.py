@@ -1,8 +1,34 @@
 from django.db import models
-from core.models import HistoricalPeriod, Civilization
+from django.db.models import Q
+from core.geo import encode_geohash
+from core.models import HistoricalPeriod, Civilization, SearchKeyMixin
 
-class TimelineEvent(models.Model):
+# Events lasting 2**MAX_SPAN_LEVEL years or more share the top span level
+MAX_SPAN_LEVEL = 16
+
+class TimelineEventQuerySet(models.QuerySet):
+    def overlapping(self, start=None, end=None):
+        """Events whose [date_start, date_stop] interval overlaps [start, end]; either bound may be None
+
+        An event at span level L lasts less than 2**L years, so it can only
+        reach start if it begins after start - 2**L. That turns the overlap
+        test into one bounded (span_level, date_start) index range per level
+        instead of a scan over date_stop.
+        """
+        events = self
+        if end is not None:
+            events = events.filter(date_start__lte=end)
+        if start is None:
+            return events
+        levels = Q(span_level=MAX_SPAN_LEVEL)
+        for level in range(MAX_SPAN_LEVEL):
+            levels |= Q(span_level=level, date_start__gt=start - 2 ** level)
+        return events.filter(levels, date_stop__gte=start)
+
+class TimelineEvent(SearchKeyMixin, models.Model):
     """Historical events for the interactive timeline"""
+    search_key_fields = {'title_key': 'title', 'title_is_key': 'title_is'}
+
     EVENT_CATEGORIES = [
         ('political', 'Political'),
         ('military', 'Military'),
@@ -15,10 +41,14 @@ class TimelineEvent(models.Model):
 
     title = models.CharField(max_length=200)
     title_is = models.CharField(max_length=200)  # Icelandic title
+    title_key = models.CharField(max_length=400, blank=True, editable=False, db_index=True)  # Normalized search key
+    title_is_key = models.CharField(max_length=400, blank=True, editable=False, db_index=True)  # Normalized search key
     description = models.TextField()
     description_is = models.TextField()  # Icelandic description
     date_start = models.IntegerField()  # Can be negative for BCE
     date_end = models.IntegerField(null=True, blank=True)  # For events that span multiple years
+    date_stop = models.IntegerField(default=0, editable=False)  # date_end, or date_start for single-year events
+    span_level = models.SmallIntegerField(default=0, editable=False)  # Bit length of the duration in years
     period = models.ForeignKey(HistoricalPeriod, on_delete=models.SET_NULL, null=True, related_name='events')
     civilization = models.ForeignKey(Civilization, on_delete=models.SET_NULL, null=True, blank=True, related_name='events')
     region = models.CharField(max_length=100)
@@ -26,15 +56,55 @@ class TimelineEvent(models.Model):
     importance = models.IntegerField(default=1)  # 1-5 scale for filtering importance levels
     latitude = models.FloatField(null=True, blank=True)  # For map placement
     longitude = models.FloatField(null=True, blank=True)  # For map placement
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)  # See core.geo
     image = models.ImageField(upload_to='events/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TimelineEventQuerySet.as_manager()
+
     def __str__(self):
         return self.title_is
 
+    # Stored fields computed from other fields: source fields -> derived fields
+    derived_fields = {
+        ('date_start', 'date_end'): ('date_stop', 'span_level'),
+        ('latitude', 'longitude'): ('geohash',),
+    }
+
+    def update_derived_fields(self):
+        """Fill date_stop/span_level from the dates and geohash from the coordinates"""
+        if self.date_end is not None and self.date_end > self.date_start:
+            self.date_stop = self.date_end
+        else:
+            self.date_stop = self.date_start
+        self.span_level = min((self.date_stop - self.date_start).bit_length(), MAX_SPAN_LEVEL)
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.update_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for source_fields, fields in self.derived_fields.items():
+                if update_fields & set(source_fields):
+                    update_fields.update(fields)
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['date_start', 'importance']
+        indexes = [
+            # Keyset pagination and year ranges in filter_events (see core.pagination)
+            models.Index(fields=['date_start', 'id'], name='event_start_idx'),
+            # One per filter_events equality filter, each followed by the sort key
+            models.Index(fields=['period', 'date_start', 'id'], name='event_period_start_idx'),
+            models.Index(fields=['civilization', 'date_start', 'id'], name='event_civ_start_idx'),
+            models.Index(fields=['category', 'date_start', 'id'], name='event_category_start_idx'),
+            models.Index(fields=['importance', 'date_start', 'id'], name='event_importance_start_idx'),
+            # Year window overlap, see TimelineEventQuerySet.overlapping
+            models.Index(fields=['span_level', 'date_start'], name='event_span_start_idx'),
+        ]
 
 class TimelineRelation(models.Model):
     """Relationships between timeline events"""
@@ -56,3 +126,56 @@ class TimelineRelation(models.Model):
 
     class Meta:
         unique_together = ('from_event', 'to_event', 'relation_type')
+
+class EventHistogram(models.Model):
+    """Event counts per time bucket, category and civilization, kept up to date by timeline.signals"""
+    RESOLUTIONS = [
+        ('year', 'Year'),
+        ('decade', 'Decade'),
+        ('century', 'Century'),
+        ('millennium', 'Millennium'),
+    ]
+    BUCKET_SIZES = {'year': 1, 'decade': 10, 'century': 100, 'millennium': 1000}
+
+    resolution = models.CharField(max_length=10, choices=RESOLUTIONS)
+    bucket = models.IntegerField()  # First year of the bucket, floored so 5 BCE falls in -10..-1
+    category = models.CharField(max_length=20, choices=TimelineEvent.EVENT_CATEGORIES)
+    civilization = models.ForeignKey(Civilization, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.resolution} {self.bucket} {self.category}: {self.count}"
+
+    class Meta:
+        unique_together = ('resolution', 'bucket', 'category', 'civilization')
+
+class CausalClosure(models.Model):
+    """Every (cause, eventual effect) pair over cause/effect relations, kept up to date by timeline.signals"""
+    ancestor = models.ForeignKey(TimelineEvent, on_delete=models.CASCADE, related_name='+')
+    descendant = models.ForeignKey(TimelineEvent, on_delete=models.CASCADE, related_name='+')
+    depth = models.IntegerField()  # Relations in the shortest chain from ancestor to descendant
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['ancestor', 'depth'], name='closure_ancestor_depth_idx'),
+            models.Index(fields=['descendant', 'depth'], name='closure_descendant_depth_idx'),
+        ]
+
+class ConcurrentEvent(models.Model):
+    """Events from other civilizations overlapping an event in time, derived by derive_concurrent_events"""
+    event = models.ForeignKey(TimelineEvent, on_delete=models.CASCADE, related_name='concurrent_events')
+    other = models.ForeignKey(TimelineEvent, on_delete=models.CASCADE, related_name='+')
+    rank = models.IntegerField()  # 1 is the most important, closest in time
+
+    def __str__(self):
+        return f"{self.event_id} ~ {self.other_id} (#{self.rank})"
+
+    class Meta:
+        unique_together = ('event', 'other')
+        indexes = [
+            models.Index(fields=['event', 'rank'], name='concurrent_event_rank_idx'),
+        ]
@@ -0,0 +1,74 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from core.models import Civilization
+
+from .models import TimelineEvent, TimelineRelation
+from . import closure, histogram
+
+
+@receiver(pre_save, sender=TimelineEvent)
+def remember_previous_event(sender, instance, raw=False, **kwargs):
+    """Keep the stored bucket fields of an event so the histogram can apply the difference"""
+    instance._histogram_previous = None
+    if not raw and instance.pk:
+        instance._histogram_previous = TimelineEvent.objects.filter(pk=instance.pk).values_list(
+            'date_start', 'category', 'civilization_id').first()
+
+
+@receiver(post_save, sender=TimelineEvent)
+def update_histogram(sender, instance, raw=False, **kwargs):
+    """Update the event histogram when an event is saved"""
+    if raw:
+        return
+    histogram.record_event(instance, getattr(instance, '_histogram_previous', None))
+
+
+@receiver(post_delete, sender=TimelineEvent)
+def remove_from_histogram(sender, instance, **kwargs):
+    """Update the event histogram when an event is deleted"""
+    histogram.forget_event(instance)
+
+
+@receiver(pre_delete, sender=Civilization)
+def fold_civilization_histogram(sender, instance, **kwargs):
+    """Count a deleted civilization's events as unassigned, as the events themselves become"""
+    histogram.fold_civilization(instance.pk)
+
+
+@receiver(pre_delete, sender=TimelineEvent)
+def remember_event_ancestors(sender, instance, **kwargs):
+    """Keep the event's causes, whose chains ran through it, before the delete cascades"""
+    instance._closure_ancestors = closure.event_ancestors(instance.pk)
+
+
+@receiver(post_delete, sender=TimelineEvent)
+def remove_from_closure(sender, instance, **kwargs):
+    """Recompute the causal closure of everything that led to a deleted event"""
+    closure.recompute(getattr(instance, '_closure_ancestors', []))
+
+
+@receiver(pre_save, sender=TimelineRelation)
+def remember_previous_relation(sender, instance, raw=False, **kwargs):
+    """Keep the stored endpoints of a relation so the closure can apply the difference"""
+    instance._closure_previous = None
+    if not raw and instance.pk:
+        instance._closure_previous = TimelineRelation.objects.filter(pk=instance.pk).values_list(
+            'from_event_id', 'to_event_id', 'relation_type').first()
+
+
+@receiver(post_save, sender=TimelineRelation)
+def update_closure(sender, instance, raw=False, **kwargs):
+    """Update the causal closure when a relation is saved"""
+    if raw:
+        return
+    closure.record_relation(instance, getattr(instance, '_closure_previous', None))
+
+
+@receiver(post_delete, sender=TimelineRelation)
+def remove_relation_from_closure(sender, instance, origin=None, **kwargs):
+    """Update the causal closure when a relation is deleted"""
+    # Deleting an event cascades to its relations; remove_from_closure handles those
+    if isinstance(origin, TimelineEvent) or getattr(origin, 'model', None) is TimelineEvent:
+        return
+    closure.forget_relation(instance)
@@ -1,3 +1,632 @@
-from django.test import TestCase
+import json
+import os
+import random
+import re
+import tempfile
+from io import StringIO
+from itertools import combinations
+from pathlib import Path
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from unittest import skipUnless
+
+from core.geo import distance_km
+from core.indexes import bump_content_version
+from core.models import Civilization, HistoricalPeriod
+from core.pagination import encode_cursor, keyset_queryset
+from . import closure, histogram
+from .concurrency import EventSpan, concurrent_events
+from .graph import RelationGraph, build_effects_subgraph, build_graph
+from .landing import EVENTS_PER_CIVILIZATION, build_initial_events
+from .models import CausalClosure, EventHistogram, TimelineEvent, TimelineRelation
+from .views import EVENT_FIELDS, EVENT_ORDER, MAP_MAX_ZOOM, event_neighbours, filtered_events
+
+FILTER_VALUES = {
+    'period': '1',
+    'civilization': '1',
+    'category': 'military',
+    'importance': '3',
+    'start_year': '-500',
+    'end_year': '500',
+}
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class FilterEventsQueryPlanTests(TestCase):
+    """Every filter_events filter combination should be answered from an index"""
+
+    def plan(self, params, cursor=None):
+        events = filtered_events(params).values(*EVENT_FIELDS)
+        return keyset_queryset(events, EVENT_ORDER, cursor)[:501].explain()
+
+    def assertUsesIndex(self, plan):
+        table_scans = [
+            line for line in plan.splitlines()
+            if re.search(r'SCAN timeline_timelineevent\b', line) and 'USING' not in line
+        ]
+        self.assertEqual(table_scans, [], plan)
+        self.assertIn('INDEX', plan)
+
+    def test_filter_combinations_use_an_index(self):
+        names = list(FILTER_VALUES)
+        for size in range(len(names) + 1):
+            for combination in combinations(names, size):
+                params = {name: FILTER_VALUES[name] for name in combination}
+                with self.subTest(filters=combination):
+                    self.assertUsesIndex(self.plan(params))
+
+    def test_later_pages_use_an_index(self):
+        cursor = encode_cursor([-200, 10])
+        for name, value in FILTER_VALUES.items():
+            with self.subTest(filter=name):
+                self.assertUsesIndex(self.plan({name: value}, cursor))
+
+
+class FilterEventsCursorTests(TestCase):
+    """Malformed cursors are rejected with 400 instead of reaching the ORM"""
+
+    def test_bad_cursors(self):
+        url = reverse('timeline:filter_events')
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor([-200, 10])}).status_code, 200)
+        bad_cursors = [encode_cursor([{}, 1]), encode_cursor([[1], 2]), encode_cursor([True, 2]),
+                       encode_cursor([1]), encode_cursor({'date_start': 1}), 'not a cursor']
+        for cursor in bad_cursors:
+            for output in ('json', 'ndjson'):
+                with self.subTest(cursor=cursor, format=output):
+                    response = self.client.get(url, {'cursor': cursor, 'format': output})
+                    self.assertEqual(response.status_code, 400)
+
+
+class OverlappingEventsTests(TestCase):
+    """Year windows match every event whose years overlap them"""
+
+    def event(self, title, date_start, date_end=None):
+        return TimelineEvent.objects.create(
+            title=title, title_is=title, description='', description_is='', region='',
+            category='military', date_start=date_start, date_end=date_end,
+        )
+
+    def test_overlapping(self):
+        war = self.event('Long war', -1000, 300)
+        inside = self.event('Inside', -100)
+        before = self.event('Before', -700, -600)
+        after = self.event('After', 200)
+        self.event('Ancient', -50000, -40000)
+
+        def titles(start, end):
+            return set(TimelineEvent.objects.overlapping(start, end).values_list('title', flat=True))
+
+        self.assertEqual(titles(-200, 100), {war.title, inside.title})
+        self.assertEqual(titles(-650, -650), {war.title, before.title})
+        self.assertEqual(titles(None, -600), {war.title, before.title, 'Ancient'})
+        self.assertEqual(titles(250, None), {war.title})
+        self.assertEqual(titles(-200, None) - titles(-200, 100), {after.title})
+
+    def test_span_follows_date_changes(self):
+        event = self.event('Siege', -400)
+        event.date_end = -380
+        event.save(update_fields=['date_end'])
+        event.refresh_from_db()
+        self.assertEqual((event.date_stop, event.span_level), (-380, 5))
+
+
+class InitialEventsTests(TestCase):
+    """The landing page keeps the earliest events of every civilization"""
+
+    def test_per_civilization(self):
+        greece = Civilization.objects.create(name='Greece', name_is='Grikkland', start_year=-800, end_year=-146,
+                                             region='', description='', description_is='')
+        for year in range(EVENTS_PER_CIVILIZATION + 5):
+            for civilization in (greece, None):
+                TimelineEvent.objects.create(
+                    title=str(year), title_is=str(year), description='', description_is='', region='',
+                    category='military', date_start=-year, civilization=civilization)
+
+        expected = []
+        for civilization in (greece, None):
+            expected += TimelineEvent.objects.filter(civilization=civilization).order_by(
+                'date_start', 'id').values_list('date_start', 'id')[:EVENTS_PER_CIVILIZATION]
+        self.assertEqual(build_initial_events(), [event_id for date_start, event_id in sorted(expected)])
+
+
+class EventHistogramTests(TestCase):
+    """The histogram maintained on save matches a full rebuild"""
+
+    def counts(self):
+        return set(EventHistogram.objects.values_list('resolution', 'bucket', 'category', 'civilization_id', 'count'))
+
+    def test_rollup_matches_rebuild(self):
+        events = [
+            TimelineEvent.objects.create(
+                title=str(year), title_is=str(year), description='', description_is='', region='',
+                category='military', date_start=year)
+            for year in [-1005, -5, 0, 9, 10, 1999]
+        ]
+        greece, rome = [
+            Civilization.objects.create(name=name, name_is=name, start_year=-800, end_year=500, region='',
+                                        description='', description_is='')
+            for name in ('Greece', 'Rome')
+        ]
+        for event, civilization in zip(events, [greece, greece, rome, greece, None, rome]):
+            event.civilization = civilization
+            event.save()
+        events[1].date_start = 15
+        events[1].category = 'cultural'
+        events[1].save()
+        events[2].delete()
+        self.assertFalse(EventHistogram.objects.filter(resolution='decade', bucket=-10).exists())
+        self.assertEqual(
+            EventHistogram.objects.get(resolution='decade', bucket=0, category='military').count, 1)
+
+        maintained = self.counts()
+        histogram.rebuild_all()
+        self.assertEqual(maintained, self.counts())
+
+        # The events survive with no civilization, so their counts move to the unassigned rows
+        greece.delete()
+        self.assertEqual(
+            EventHistogram.objects.get(resolution='century', bucket=0, category='military', civilization=None).count, 2)
+        maintained = self.counts()
+        histogram.rebuild_all()
+        self.assertEqual(maintained, self.counts())
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class EventHistogramViewTests(TestCase):
+    """Bucket counts per resolution, broken down and filtered"""
+
+    def setUp(self):
+        self.greece, self.rome = [
+            Civilization.objects.create(name=name, name_is=name, start_year=-1100, end_year=500, region='',
+                                        description='', description_is='')
+            for name in ('Greece', 'Rome')
+        ]
+        for year, category, civilization in [(-1005, 'military', self.greece), (-5, 'military', self.greece),
+                                              (-5, 'cultural', None), (9, 'military', self.rome),
+                                              (10, 'political', self.rome), (1999, 'cultural', None)]:
+            TimelineEvent.objects.create(title=str(year), title_is=str(year), description='', description_is='',
+                                         region='', category=category, date_start=year, civilization=civilization)
+        self.url = reverse('timeline:event_histogram')
+
+    def buckets(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {tuple(bucket.values())[:-1]: bucket['events'] for bucket in response.json()['buckets']}
+
+    def test_resolutions(self):
+        expected = {
+            'year': {-1005: 1, -5: 2, 9: 1, 10: 1, 1999: 1},
+            'decade': {-1010: 1, -10: 2, 0: 1, 10: 1, 1990: 1},
+            'century': {-1100: 1, -100: 2, 0: 2, 1900: 1},
+            'millennium': {-2000: 1, -1000: 2, 0: 2, 1000: 1},
+        }
+        for resolution, counts in expected.items():
+            with self.subTest(resolution=resolution):
+                self.assertEqual(self.buckets(resolution=resolution, group=''),
+                                 {(bucket,): count for bucket, count in counts.items()})
+        self.assertEqual(self.client.get(self.url, {'group': ''}).json()['bucket_size'], 100)
+
+    def test_groups(self):
+        self.assertEqual(self.buckets(group='category'), {
+            (-1100, 'military'): 1, (-100, 'cultural'): 1, (-100, 'military'): 1, (0, 'military'): 1,
+            (0, 'political'): 1, (1900, 'cultural'): 1,
+        })
+        greece, rome = self.greece.id, self.rome.id
+        self.assertEqual(self.buckets(group='civilization'), {
+            (-1100, greece): 1, (-100, greece): 1, (-100, None): 1, (0, rome): 2, (1900, None): 1,
+        })
+        self.assertEqual(self.buckets(), {
+            (-1100, 'military', greece): 1, (-100, 'military', greece): 1, (-100, 'cultural', None): 1,
+            (0, 'military', rome): 1, (0, 'political', rome): 1, (1900, 'cultural', None): 1,
+        })
+
+    def test_filters(self):
+        self.assertEqual(self.buckets(group='', civilization=self.greece.id), {(-1100,): 1, (-100,): 1})
+        self.assertEqual(self.buckets(group='', category='cultural'), {(-100,): 1, (1900,): 1})
+        self.assertEqual(self.buckets(group='', resolution='decade', start_year=-5, end_year=9),
+                         {(-10,): 2, (0,): 1})
+        self.assertEqual(self.buckets(group='civilization', resolution='millennium', start_year=0, end_year=999,
+                                      civilization=self.rome.id), {(0, self.rome.id): 2})
+
+    def test_invalid(self):
+        for params in [{'resolution': 'week'}, {'group': 'region'}, {'civilization': 'Rome'},
+                       {'start_year': 'long ago'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+class RelationGraphTests(SimpleTestCase):
+    """Cause/effect traversal over normalized relations"""
+
+    def setUp(self):
+        # 1 caused 2 and 2 caused 3, written from both sides; 4 is only related
+        self.graph = RelationGraph([
+            (2, 1, 'cause'),
+            (2, 3, 'effect'),
+            (3, 4, 'related'),
+        ])
+
+    def test_traverse(self):
+        self.assertEqual(self.graph.traverse(1, 'effects', 5), {2: 1, 3: 2})
+        self.assertEqual(self.graph.traverse(3, 'causes', 1), {2: 1})
+        self.assertEqual(self.graph.traverse(4, 'causes', 5), {})
+
+    def test_shortest_path(self):
+        self.assertEqual(self.graph.shortest_path(1, 3), [1, 2, 3])
+        self.assertIsNone(self.graph.shortest_path(3, 1))
+        self.assertIsNone(self.graph.shortest_path(1, 4))
+
+
+class CausalClosureTests(TestCase):
+    """The closure maintained by signals matches a full rebuild after every change"""
+
+    def setUp(self):
+        self.events = [
+            TimelineEvent.objects.create(
+                title=str(i), title_is=str(i), description='', description_is='', region='',
+                category='political', date_start=i)
+            for i in range(6)
+        ]
+
+    def relate(self, cause, effect, relation_type='effect'):
+        if relation_type == 'cause':
+            cause, effect = effect, cause
+        return TimelineRelation.objects.create(
+            from_event=self.events[cause], to_event=self.events[effect], relation_type=relation_type)
+
+    def assertClosureCurrent(self):
+        maintained = set(CausalClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+        closure.rebuild_all()
+        self.assertEqual(maintained, set(CausalClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth')))
+
+    def test_incremental_maintenance(self):
+        self.relate(0, 1)
+        self.relate(1, 2, 'cause')
+        shortcut = self.relate(0, 2)
+        self.relate(2, 3)
+        self.relate(3, 4, 'related')
+        self.assertClosureCurrent()
+        self.assertEqual(
+            CausalClosure.objects.get(ancestor=self.events[0], descendant=self.events[3]).depth, 2)
+
+        shortcut.delete()
+        self.assertClosureCurrent()
+        self.assertEqual(
+            CausalClosure.objects.get(ancestor=self.events[0], descendant=self.events[3]).depth, 3)
+
+        # A cycle must not create self pairs
+        loop = self.relate(3, 0)
+        self.assertClosureCurrent()
+        self.assertFalse(CausalClosure.objects.filter(ancestor_id=F('descendant_id')).exists())
+
+        loop.relation_type = 'related'
+        loop.save()
+        self.assertClosureCurrent()
+
+        self.events[1].delete()
+        self.assertClosureCurrent()
+        self.assertFalse(CausalClosure.objects.filter(ancestor=self.events[0]).exists())
+
+    def test_removal_reads_only_the_reachable_subgraph(self):
+        self.relate(0, 1)
+        self.relate(1, 2, 'cause')
+        self.relate(4, 5)
+        subgraph = build_effects_subgraph([self.events[0].id])
+        self.assertEqual(set(subgraph.effects), {self.events[0].id, self.events[1].id})
+        self.assertEqual(subgraph.traverse(self.events[0].id, 'effects'), build_graph().traverse(
+            self.events[0].id, 'effects'))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, CONTENT_VERSION_TTL=0)
+class CausalViewTests(TestCase):
+    """The chain and path endpoints answer from the maintained closure"""
+
+    def setUp(self):
+        self.events = [
+            TimelineEvent.objects.create(
+                title=str(i), title_is=str(i), description='', description_is='', region='',
+                category='political', date_start=i)
+            for i in range(7)
+        ]
+        self.positions = {event.id: i for i, event in enumerate(self.events)}
+        self.relations = {
+            (cause, effect): TimelineRelation.objects.create(
+                from_event=self.events[cause], to_event=self.events[effect], relation_type='effect')
+            for cause, effect in [(0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 3)]
+        }
+        bump_content_version()
+
+    def chain(self, event, direction, depth=None):
+        params = {} if depth is None else {'depth': depth}
+        response = self.client.get(reverse(f'timeline:event_{direction}', args=[self.events[event].id]), params)
+        self.assertEqual(response.status_code, 200)
+        return [(self.positions[row['id']], row['depth']) for row in response.json()['events']]
+
+    def path(self, source, target):
+        response = self.client.get(reverse('timeline:causal_path'),
+                                   {'from': self.events[source].id, 'to': self.events[target].id})
+        self.assertEqual(response.status_code, 200)
+        path = response.json()['path']
+        return None if path is None else [self.positions[row['id']] for row in path]
+
+    def unrelate(self, cause, effect):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.relations.pop((cause, effect)).delete()
+
+    def test_chain_depth(self):
+        self.assertEqual(self.chain(0, 'effects', 1), [(1, 1), (5, 1)])
+        self.assertEqual(self.chain(0, 'effects', 2), [(1, 1), (5, 1), (2, 2), (3, 2)])
+        self.assertEqual(self.chain(0, 'effects', 'all'), [(1, 1), (5, 1), (2, 2), (3, 2), (4, 3)])
+        self.assertEqual(self.chain(0, 'effects'), self.chain(0, 'effects', 3))
+        self.assertEqual(self.chain(4, 'causes', 1), [(3, 1)])
+        self.assertEqual(self.chain(4, 'causes', 'all'), [(3, 1), (2, 2), (5, 2), (0, 3), (1, 3)])
+        self.assertEqual(self.chain(6, 'causes', 'all'), [])
+
+    def test_shortest_path(self):
+        self.assertEqual(self.path(0, 4), [0, 5, 3, 4])
+        self.assertEqual(self.path(4, 0), [0, 5, 3, 4])
+        self.assertEqual(self.path(1, 3), [1, 2, 3])
+        self.assertIsNone(self.path(1, 5))
+        self.assertIsNone(self.path(0, 6))
+
+    def test_after_removing_relations(self):
+        self.unrelate(5, 3)
+        self.assertEqual(self.path(0, 4), [0, 1, 2, 3, 4])
+        self.assertEqual(self.chain(0, 'effects', 'all'), [(1, 1), (5, 1), (2, 2), (3, 3), (4, 4)])
+        self.assertEqual(self.chain(4, 'causes', 'all'), [(3, 1), (2, 2), (1, 3), (0, 4)])
+
+        self.unrelate(2, 3)
+        self.assertIsNone(self.path(0, 4))
+        self.assertEqual(self.chain(0, 'effects', 'all'), [(1, 1), (5, 1), (2, 2)])
+        self.assertEqual(self.chain(4, 'causes', 'all'), [(3, 1)])
+
+    def test_invalid(self):
+        url = reverse('timeline:causal_path')
+        event = self.events[0].id
+        for params in [{}, {'from': event}, {'to': event}, {'from': 'first', 'to': event}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+        effects = reverse('timeline:event_effects', args=[event])
+        for depth in [0, -1, 'deep']:
+            with self.subTest(depth=depth):
+                self.assertEqual(self.client.get(effects, {'depth': depth}).status_code, 400)
+        missing = reverse('timeline:event_effects', args=[self.events[-1].id + 1])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+class ConcurrentEventsTests(SimpleTestCase):
+    """The sweep pairs overlapping events from other civilizations, most important first"""
+
+    def test_concurrent_events(self):
+        spans = [
+            EventSpan(1, -500, -400, 1, 1, None, None),
+            EventSpan(2, -480, -480, 3, 2, None, None),
+            EventSpan(3, -450, -300, 1, 2, None, None),
+            EventSpan(4, -420, -420, 5, 1, None, None),
+            EventSpan(5, -399, -399, 5, 2, None, None),
+            EventSpan(6, -450, -450, 4, None, None, None),
+        ]
+        found = dict(concurrent_events(spans, per_event=2))
+        self.assertEqual(found[1], [2, 3])
+        self.assertEqual(found[3], [4, 1])
+        self.assertEqual(found[4], [3])
+        self.assertEqual(found[5], [])
+        self.assertEqual(found[6], [])
+
+    def test_max_distance(self):
+        spans = [
+            EventSpan(1, 0, 10, 1, 1, 41.9, 12.5),  # Rome
+            EventSpan(2, 5, 5, 1, 2, 37.98, 23.73),  # Athens
+            EventSpan(3, 5, 5, 1, 3, 30.0, 31.2),  # Cairo
+        ]
+        found = dict(concurrent_events(spans, per_event=5, max_distance=1200))
+        self.assertEqual(found[1], [2])
+        self.assertEqual(found[3], [2])
+
+    def brute_force(self, spans, span, per_event, max_distance):
+        if span.civilization_id is None or (max_distance is not None and span.latitude is None):
+            return []
+        ranked = []
+        for other in spans:
+            if other.id == span.id or other.civilization_id in (None, span.civilization_id):
+                continue
+            if max_distance is not None and (other.latitude is None or distance_km(
+                    span.latitude, span.longitude, other.latitude, other.longitude) > max_distance):
+                continue
+            # Ties go to events already running, latest id first, then to those starting later, lowest id first
+            if (other.start, other.id) < (span.start, span.id):
+                if other.stop >= span.start:
+                    ranked.append((-other.importance, span.start - other.start, 0, -other.id, other.id))
+            elif other.start <= span.stop:
+                ranked.append((-other.importance, other.start - span.start, 1, other.id, other.id))
+        return [row[-1] for row in sorted(ranked)[:per_event]]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        for trial in range(200):
+            spans = []
+            for event_id in range(rng.randint(1, 50)):
+                start = rng.randint(-50, 50)
+                located = rng.random() < 0.85
+                # Some points sit by the poles or the antimeridian, where grid cells wrap
+                latitude = rng.choice([rng.uniform(-90, 90), 89.9, -89.9, 60.0]) if located else None
+                longitude = rng.choice([rng.uniform(-180, 180), 179.9, -179.9]) if located else None
+                spans.append(EventSpan(event_id, start, start + rng.choice([0, rng.randint(0, 40)]),
+                                       rng.randint(1, 3), rng.choice([None, 1, 2, 3]), latitude, longitude))
+            per_event = rng.randint(1, 5)
+            max_distance = rng.choice([None, 100, 1000, 5000, 25000])
+            for event_id, found in concurrent_events(spans, per_event, max_distance):
+                self.assertEqual(found, self.brute_force(spans, spans[event_id], per_event, max_distance),
+                                 (trial, event_id))
+
+
+class EventNeighbourTests(TestCase):
+    """Previous / next lookups step through (date_start, id) order, optionally within a civilization"""
+
+    def setUp(self):
+        self.greece = Civilization.objects.create(
+            name='Greece', name_is='Grikkland', start_year=-800, end_year=-146, region='', description='',
+            description_is='')
+        self.events = [
+            TimelineEvent.objects.create(
+                title=str(index), title_is=str(index), description='', description_is='', region='',
+                category='military', date_start=date_start, civilization=self.greece if greek else None)
+            for index, (date_start, greek) in enumerate([(-500, True), (-490, False), (-490, True), (-480, False),
+                                                         (-480, True)])
+        ]
+
+    def ids(self, rows):
+        return [row['id'] for row in rows]
+
+    def test_neighbours(self):
+        first, second, third, fourth, fifth = self.events
+        previous, following = event_neighbours(third, 'all', limit=2)
+        self.assertEqual(self.ids(previous), [second.id, first.id])
+        self.assertEqual(self.ids(following), [fourth.id, fifth.id])
+
+        previous, following = event_neighbours(third, 'civilization', limit=5)
+        self.assertEqual(self.ids(previous), [first.id])
+        self.assertEqual(self.ids(following), [fifth.id])
+        self.assertIsNone(event_neighbours(second, 'civilization'))
+        self.assertIsNone(event_neighbours(second, 'period'))
+
+    def test_window_endpoint(self):
+        url = reverse('timeline:event_neighbours', args=[self.events[0].id])
+        data = self.client.get(url, {'n': 3}).json()
+        self.assertEqual(data['previous'], [])
+        self.assertEqual([event['id'] for event in data['next']], self.ids(
+            TimelineEvent.objects.order_by(*EVENT_ORDER).values('id')[1:4]))
+        self.assertEqual(self.client.get(url, {'scope': 'region'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'n': 0}).status_code, 400)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class EventMapTests(TestCase):
+    """Map markers inside a bounding box, clustered by zoom"""
+
+    def setUp(self):
+        self.events = {
+            title: TimelineEvent.objects.create(
+                title=title, title_is=title, description='', description_is='', region='', category='military',
+                date_start=-480, latitude=latitude, longitude=longitude)
+            for title, latitude, longitude in [('Athens', 37.98, 23.73), ('Marathon', 38.15, 23.96),
+                                               ('Rome', 41.9, 12.5), ('Fiji', -17.8, 178.0),
+                                               ('Samoa', -13.8, -172.0), ('Nowhere', None, None)]
+        }
+        self.url = reverse('timeline:event_map')
+
+    def clusters(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['clusters']
+
+    def titles(self, **params):
+        ids = [cluster['event'] for cluster in self.clusters(zoom=MAP_MAX_ZOOM, **params)]
+        return sorted(title for title, event in self.events.items() if event.id in ids)
+
+    def test_bbox(self):
+        self.assertEqual(self.titles(), ['Athens', 'Fiji', 'Marathon', 'Rome', 'Samoa'])
+        self.assertEqual(self.titles(bbox='35,20,40,25'), ['Athens', 'Marathon'])
+        self.assertEqual(self.titles(bbox='35,10,45,20'), ['Rome'])
+        self.assertEqual(self.titles(bbox='-60,-60,-50,-50'), [])
+
+    def test_bbox_across_antimeridian(self):
+        self.assertEqual(self.titles(bbox='-20,170,-10,-170'), ['Fiji', 'Samoa'])
+        self.assertEqual(self.titles(bbox='-20,175,-10,179'), ['Fiji'])
+
+    def test_clusters_by_zoom(self):
+        greece = '35,20,40,25'
+        clusters = self.clusters(bbox=greece, zoom=2)
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['count'], 2)
+        self.assertIsNone(clusters[0]['event'])
+        self.assertAlmostEqual(clusters[0]['latitude'], (37.98 + 38.15) / 2)
+
+        clusters = self.clusters(bbox=greece, zoom=10)
+        self.assertEqual([cluster['count'] for cluster in clusters], [1, 1])
+        self.assertEqual({cluster['event'] for cluster in clusters},
+                         {self.events['Athens'].id, self.events['Marathon'].id})
+
+    def test_invalid_bbox_or_zoom(self):
+        for params in [{'bbox': 'a,b,c,d'}, {'bbox': '35,20,40'}, {'bbox': '40,20,35,25'},
+                       {'bbox': '-95,20,40,25'}, {'bbox': '35,20,40,185'}, {'zoom': -1},
+                       {'zoom': MAP_MAX_ZOOM + 1}, {'zoom': 'far'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class BuildMapTilesTests(TestCase):
+    """Tiles are written under a content hash directory next to index.json"""
+
+    def setUp(self):
+        self.period = HistoricalPeriod.objects.create(name='Classical', name_is='Klassíska tímabilið',
+                                                      start_year=-500, end_year=-300, description='',
+                                                      description_is='')
+        self.athens, self.rome = [
+            TimelineEvent.objects.create(title=title, title_is=title, description='', description_is='', region='',
+                                         category=category, date_start=-480, period=period, latitude=latitude,
+                                         longitude=longitude)
+            for title, category, period, latitude, longitude in [
+                ('Athens', 'military', self.period, 37.98, 23.73), ('Rome', 'political', None, 41.9, 12.5)]
+        ]
+        TimelineEvent.objects.create(title='Nowhere', title_is='Nowhere', description='', description_is='',
+                                     region='', category='cultural', date_start=-480)
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.output = Path(static_root.name) / 'map-tiles'
+        settings = override_settings(STATIC_ROOT=static_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def build(self, **options):
+        call_command('build_map_tiles', max_zoom=2, stdout=StringIO(), **options)
+        return json.loads((self.output / 'index.json').read_text())
+
+    def clusters(self, version, *parts):
+        return json.loads(self.output.joinpath(version, *parts).read_text())['clusters']
+
+    def versions(self):
+        return sorted(path.name for path in self.output.iterdir() if path.is_dir())
+
+    def test_layout_and_index(self):
+        index = self.build()
+        version = index['version']
+        self.assertRegex(version, r'^[0-9a-f]{16}$')
+        self.assertEqual(index['url'], f'/static/map-tiles/{version}/{{period}}/{{category}}/{{z}}/{{x}}/{{y}}.json')
+        self.assertEqual(index['max_zoom'], 2)
+        self.assertEqual(index['periods'], [self.period.id])
+        self.assertEqual(index['categories'], ['military', 'political'])
+
+        # Zoom 0 is a single tile holding both located events
+        self.assertEqual(sum(cluster[2] for cluster in self.clusters(version, 'all', 'all', '0', '0', '0.json')), 2)
+        self.assertEqual(self.clusters(version, str(self.period.id), 'military', '0', '0', '0.json'),
+                         [[37.98, 23.73, 1, self.athens.id]])
+        self.assertEqual(self.clusters(version, 'all', 'political', '0', '0', '0.json'),
+                         [[41.9, 12.5, 1, self.rome.id]])
+        self.assertFalse((self.output / version / 'all' / 'cultural').exists())
+        for zoom in range(3):
+            self.assertTrue((self.output / version / 'all' / 'all' / str(zoom)).is_dir())
+        self.assertFalse((self.output / version / 'all' / 'all' / '3').exists())
+
+        # Unchanged content keeps the same version
+        self.assertEqual(self.build()['version'], version)
+        self.assertEqual(self.versions(), [version])
+
+    def test_old_versions_are_pruned(self):
+        first = self.build()['version']
+        self.rome.latitude = 41.8
+        self.rome.save()
+        second = self.build(keep=2)['version']
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.versions(), sorted([first, second]))
+
+        # The oldest build goes once keep is exceeded
+        os.utime(self.output / first, (0, 0))
+        self.rome.latitude = 41.7
+        self.rome.save()
+        third = self.build(keep=2)['version']
+        self.assertEqual(self.versions(), sorted([second, third]))
+        self.assertEqual(self.build(keep=1)['version'], third)
+        self.assertEqual(self.versions(), [third])
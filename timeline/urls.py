@@ -6,5 +6,11 @@ app_name = 'timeline'
 urlpatterns = [
     path('', views.timeline, name='timeline'),
     path('event/<int:event_id>/', views.event_detail, name='event_detail'),
+    path('event/<int:event_id>/neighbours/', views.event_neighbour_window, name='event_neighbours'),
+    path('event/<int:event_id>/causes/', views.event_chain, {'direction': 'causes'}, name='event_causes'),
+    path('event/<int:event_id>/effects/', views.event_chain, {'direction': 'effects'}, name='event_effects'),
+    path('causal-path/', views.causal_path, name='causal_path'),
     path('filter/', views.filter_events, name='filter_events'),
+    path('histogram/', views.event_histogram, name='event_histogram'),
+    path('map/', views.event_map, name='event_map'),
 ]
\ No newline at end of file
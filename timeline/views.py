@@ -1,8 +1,20 @@
+import json
+
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from .models import TimelineEvent, TimelineRelation
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Avg, Count, Min, Q, Sum
+from django.db.models.functions import Substr
+from .models import TimelineEvent, TimelineRelation, EventHistogram, CausalClosure
+from .graph import INVERSE_RELATION_TYPES, relation_graph
+from .histogram import bucket_for
+from .landing import initial_timeline_events
 from core.models import HistoricalPeriod, Civilization
+from core.cache import cache_public_page, conditional_object_page
+from core.geo import cover_bbox, precision_for_width
+from core.pagination import keyset_neighbours, keyset_page, keyset_queryset, row_cursor
+from core.text import prefix_range
 
+@cache_public_page
 def timeline(request):
     """Main timeline view with interactive timeline and map"""
     # Get all periods for filtering
@@ -12,23 +24,9 @@ def timeline(request):
     civilizations = Civilization.objects.all().order_by('name_is')
 
     # Get initial events (limited to improve performance)
-    # Get a balanced set of events from each civilization
-    events = []
-
-    # Get all civilizations
-    all_civilizations = Civilization.objects.all()
-
-    # Get events from each civilization (up to 20 per civilization)
-    for civ in all_civilizations:
-        civ_events = TimelineEvent.objects.filter(civilization=civ).order_by('date_start')[:20]
-        events.extend(civ_events)
-
-    # Add events without a civilization
-    no_civ_events = TimelineEvent.objects.filter(civilization=None).order_by('date_start')[:20]
-    events.extend(no_civ_events)
-
-    # Sort all events chronologically
-    events = sorted(events, key=lambda x: x.date_start)
+    # A balanced set of up to 20 events per civilization (and 20 without one),
+    # picked per civilization whenever content changes (see timeline.landing)
+    events = initial_timeline_events()
 
     context = {
         'periods': periods,
@@ -38,36 +36,127 @@ def timeline(request):
 
     return render(request, 'timeline/timeline.html', context)
 
+# "Meanwhile elsewhere" events shown on event_detail
+CONCURRENT_EVENTS_SHOWN = 5
+
+# Orderings an event can be stepped through: scope -> (filter field or None, label)
+NEIGHBOUR_SCOPES = {
+    'all': (None, 'Tímalína'),
+    'civilization': ('civilization_id', 'Sama menning'),
+    'period': ('period_id', 'Sama tímabil'),
+}
+NEIGHBOUR_WINDOW = 10
+NEIGHBOUR_MAX_WINDOW = 100
+
+def event_neighbours(event, scope, limit=1, fields=('id', 'title_is', 'date_start')):
+    """(previous, next) value dicts around event in (date_start, id) order, nearest first
+
+    Scoped lookups keep to the event's civilization or period and return None
+    when the event has none. Each side is one range scan of the matching
+    (scope, date_start, id) index.
+    """
+    field, label = NEIGHBOUR_SCOPES[scope]
+    events = TimelineEvent.objects.all()
+    if field is not None:
+        value = getattr(event, field)
+        if value is None:
+            return None
+        events = events.filter(**{field: value})
+    return keyset_neighbours(events.values(*fields), EVENT_ORDER, event, limit)
+
+@conditional_object_page(TimelineEvent, 'event_id')
+@cache_public_page
 def event_detail(request, event_id):
     """Detailed view of a single timeline event"""
     event = get_object_or_404(TimelineEvent, id=event_id)
 
-    # Get related events
+    # Get related events in both directions, reading incoming relations from this event's side
     related_events = []
-    relations = TimelineRelation.objects.filter(from_event=event)
+    seen = set()
+    relations = TimelineRelation.objects.filter(Q(from_event=event) | Q(to_event=event)).select_related(
+        'from_event', 'to_event').order_by('id')
     for relation in relations:
+        if relation.from_event_id == event.id:
+            other, relation_type = relation.to_event, relation.relation_type
+        else:
+            other, relation_type = relation.from_event, INVERSE_RELATION_TYPES[relation.relation_type]
+        if (other.id, relation_type) in seen:
+            continue
+        seen.add((other.id, relation_type))
         related_events.append({
-            'event': relation.to_event,
-            'relation_type': relation.relation_type,
+            'event': other,
+            'relation_type': relation_type,
             'description': relation.description_is,
         })
 
+    # Events from other civilizations at the same time (see derive_concurrent_events)
+    concurrent_events = [
+        concurrent.other for concurrent in event.concurrent_events.select_related(
+            'other', 'other__civilization').order_by('rank')[:CONCURRENT_EVENTS_SHOWN]
+    ]
+
+    # Previous / next event on the whole timeline and within the event's civilization and period
+    neighbours = []
+    for scope, (field, label) in NEIGHBOUR_SCOPES.items():
+        found = event_neighbours(event, scope)
+        if found is not None:
+            previous, following = found
+            neighbours.append({
+                'scope': scope,
+                'label': label,
+                'previous': previous[0] if previous else None,
+                'next': following[0] if following else None,
+            })
+
     context = {
         'event': event,
         'related_events': related_events,
+        'concurrent_events': concurrent_events,
+        'neighbours': neighbours,
     }
 
     return render(request, 'timeline/event_detail.html', context)
 
-def filter_events(request):
-    """AJAX view for filtering timeline events"""
-    # Get filter parameters from request
-    period_id = request.GET.get('period')
-    civilization_id = request.GET.get('civilization')
-    category = request.GET.get('category')
-    start_year = request.GET.get('start_year')
-    end_year = request.GET.get('end_year')
-    importance = request.GET.get('importance')
+@cache_public_page
+def event_neighbour_window(request, event_id):
+    """JSON window of up to ?n= events on each side of an event, in ?scope= all, civilization or period
+
+    Lets a client step through the timeline event by event; fetching the
+    window of the first or last event it holds continues the walk.
+    """
+    event = get_object_or_404(TimelineEvent.objects.only('id', 'date_start', 'civilization_id', 'period_id'),
+                              id=event_id)
+    scope = request.GET.get('scope', 'all')
+    try:
+        limit = int(request.GET.get('n', NEIGHBOUR_WINDOW))
+        if scope not in NEIGHBOUR_SCOPES or not 1 <= limit <= NEIGHBOUR_MAX_WINDOW:
+            raise ValueError('Invalid scope or window')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid scope or window'}, status=400)
+
+    found = event_neighbours(event, scope, limit, fields=EVENT_FIELDS)
+    previous, following = found if found is not None else ([], [])
+    return JsonResponse({
+        'event': event.id,
+        'scope': scope,
+        'previous': [_event_data(row) for row in previous],
+        'next': [_event_data(row) for row in following],
+    })
+
+# Columns emitted by filter_events, in output order
+EVENT_FIELDS = ['id', 'title_is', 'date_start', 'date_end', 'category', 'importance', 'latitude', 'longitude']
+EVENT_ORDER = ['date_start', 'id']
+FILTER_PAGE_SIZE = 500
+FILTER_MAX_PAGE_SIZE = 2000
+
+def filtered_events(params):
+    """TimelineEvent queryset narrowed by the timeline filter parameters"""
+    period_id = params.get('period')
+    civilization_id = params.get('civilization')
+    category = params.get('category')
+    start_year = params.get('start_year')
+    end_year = params.get('end_year')
+    importance = params.get('importance')
 
     # Start with all events
     events = TimelineEvent.objects.all()
@@ -82,30 +171,230 @@ def filter_events(request):
     if category:
         events = events.filter(category=category)
 
-    if start_year:
-        events = events.filter(date_start__gte=start_year)
-
-    if end_year:
-        events = events.filter(date_start__lte=end_year)
+    # Keep every event whose years overlap the window, not just those starting in it
+    if start_year or end_year:
+        events = events.overlapping(
+            int(start_year) if start_year else None,
+            int(end_year) if end_year else None,
+        )
 
     if importance:
         events = events.filter(importance__gte=importance)
 
-    # Order events
-    events = events.order_by('date_start')
-
-    # Convert to list of dictionaries for JSON response
-    events_data = []
-    for event in events:
-        events_data.append({
-            'id': event.id,
-            'title': event.title_is,
-            'date_start': event.date_start,
-            'date_end': event.date_end,
-            'category': event.category,
-            'importance': event.importance,
-            'latitude': event.latitude,
-            'longitude': event.longitude,
-        })
+    return events
+
+def _event_data(row):
+    return {
+        'id': row['id'],
+        'title': row['title_is'],
+        'date_start': row['date_start'],
+        'date_end': row['date_end'],
+        'category': row['category'],
+        'importance': row['importance'],
+        'latitude': row['latitude'],
+        'longitude': row['longitude'],
+    }
+
+def _ndjson_events(rows, limit):
+    """One JSON event per line, then a final line holding the next cursor"""
+    next_cursor = None
+    last = None
+    for position, row in enumerate(rows):
+        if position == limit:
+            next_cursor = row_cursor(last, EVENT_ORDER)
+            break
+        last = row
+        yield json.dumps(_event_data(row)) + '\n'
+    yield json.dumps({'next_cursor': next_cursor}) + '\n'
+
+@cache_public_page
+def filter_events(request):
+    """AJAX view for filtering timeline events
+
+    Results are keyset paginated on (date_start, id): pass the returned
+    next_cursor back as ?cursor= for the following page. With ?format=ndjson
+    the page is streamed one event per line instead of as a single JSON body.
+    """
+    try:
+        limit = min(int(request.GET.get('limit', FILTER_PAGE_SIZE)), FILTER_MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError('Invalid limit')
+        events = filtered_events(request.GET).values(*EVENT_FIELDS)
+        cursor = request.GET.get('cursor')
+
+        if request.GET.get('format') == 'ndjson':
+            rows = keyset_queryset(events, EVENT_ORDER, cursor)[:limit + 1].iterator(chunk_size=FILTER_PAGE_SIZE)
+            return StreamingHttpResponse(_ndjson_events(rows, limit), content_type='application/x-ndjson')
+
+        page, next_cursor = keyset_page(events, EVENT_ORDER, cursor, limit)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid filter, cursor or limit'}, status=400)
+
+    return JsonResponse({'events': [_event_data(row) for row in page], 'next_cursor': next_cursor})
+
+# Dimensions event_histogram can break counts down by
+HISTOGRAM_GROUPS = ['category', 'civilization']
+
+@cache_public_page
+def event_histogram(request):
+    """Pre-aggregated event counts per time bucket for zoomed-out timeline views
+
+    ?resolution= is year, decade, century (default) or millennium. Counts are
+    broken down by category and civilization unless ?group= names a subset
+    (e.g. ?group=category, or ?group= for plain totals per bucket).
+    """
+    resolution = request.GET.get('resolution', 'century')
+    group = request.GET.get('group', ','.join(HISTOGRAM_GROUPS))
+    group = [name for name in group.split(',') if name]
+    if resolution not in EventHistogram.BUCKET_SIZES or not set(group) <= set(HISTOGRAM_GROUPS):
+        return JsonResponse({'error': 'Invalid resolution or group'}, status=400)
+
+    rows = EventHistogram.objects.filter(resolution=resolution)
+    try:
+        start_year = request.GET.get('start_year')
+        end_year = request.GET.get('end_year')
+        if start_year:
+            rows = rows.filter(bucket__gte=bucket_for(int(start_year), resolution))
+        if end_year:
+            rows = rows.filter(bucket__lte=int(end_year))
+        if request.GET.get('category'):
+            rows = rows.filter(category=request.GET['category'])
+        if request.GET.get('civilization'):
+            rows = rows.filter(civilization_id=int(request.GET['civilization']))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid filter'}, status=400)
+
+    rows = rows.values('bucket', *group).annotate(events=Sum('count')).order_by('bucket', *group)
+    return JsonResponse({
+        'resolution': resolution,
+        'bucket_size': EventHistogram.BUCKET_SIZES[resolution],
+        'buckets': list(rows),
+    })
+
+MAP_MAX_ZOOM = 18
+MAP_CELLS_PER_TILE = 4  # Cluster cells per map tile width
+
+def _map_bounds(request):
+    """(south, west, north, east, zoom) from ?bbox= and ?zoom=; raises ValueError when invalid"""
+    south, west, north, east = [float(value) for value in request.GET.get('bbox', '-90,-180,90,180').split(',')]
+    zoom = int(request.GET.get('zoom', 2))
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180
+            and 0 <= zoom <= MAP_MAX_ZOOM):
+        raise ValueError('Invalid bounding box or zoom')
+    return south, west, north, east, zoom
+
+@cache_public_page
+def event_map(request):
+    """Clustered event markers inside a bounding box for the map
+
+    Takes ?bbox=south,west,north,east, a slippy map ?zoom= and the
+    filter_events filters. The box is covered by a few geohash prefixes
+    (indexed range lookups) and events are grouped into geohash cells about a
+    quarter of a map tile wide, returning one marker per non-empty cell.
+    """
+    try:
+        south, west, north, east, zoom = _map_bounds(request)
+        events = filtered_events(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid bounding box, zoom or filter'}, status=400)
+
+    cells = Q()
+    for prefix in cover_bbox(south, west, north, east):
+        cells |= Q(**prefix_range('geohash', prefix))
+    if west <= east:
+        longitude = Q(longitude__gte=west, longitude__lte=east)
+    else:
+        longitude = Q(longitude__gte=west) | Q(longitude__lte=east)
+    events = events.filter(cells, longitude, latitude__gte=south, latitude__lte=north)
+
+    precision = precision_for_width(360 / 2 ** zoom / MAP_CELLS_PER_TILE)
+    clusters = events.order_by().values(cell=Substr('geohash', 1, precision)).annotate(
+        count=Count('id'),
+        latitude=Avg('latitude'),
+        longitude=Avg('longitude'),
+        event=Min('id'),
+    ).order_by('cell')
+
+    return JsonResponse({
+        'zoom': zoom,
+        'precision': precision,
+        'clusters': [{
+            'geohash': cluster['cell'],
+            'count': cluster['count'],
+            'latitude': cluster['latitude'],
+            'longitude': cluster['longitude'],
+            'event': cluster['event'] if cluster['count'] == 1 else None,
+        } for cluster in clusters],
+    })
+
+MAX_CHAIN_EVENTS = 1000
+
+def _event_summaries(event_ids):
+    """{id: summary dict} for the given events in one query"""
+    rows = TimelineEvent.objects.filter(id__in=event_ids).values('id', 'title_is', 'date_start', 'date_end')
+    return {
+        row['id']: {'id': row['id'], 'title': row['title_is'], 'date_start': row['date_start'],
+                    'date_end': row['date_end']}
+        for row in rows
+    }
+
+@cache_public_page
+def event_chain(request, event_id, direction):
+    """JSON list of an event's transitive causes or effects up to ?depth= hops, or every one with ?depth=all
+
+    Reads the precomputed closure (see timeline.closure), so any depth is a
+    single indexed lookup.
+    """
+    get_object_or_404(TimelineEvent.objects.only('id'), id=event_id)
+    depth = request.GET.get('depth', '3')
+    try:
+        depth = None if depth == 'all' else int(depth)
+        if depth is not None and depth < 1:
+            raise ValueError('Invalid depth')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid depth'}, status=400)
+
+    if direction == 'causes':
+        other, rows = 'ancestor', CausalClosure.objects.filter(descendant_id=event_id)
+    else:
+        other, rows = 'descendant', CausalClosure.objects.filter(ancestor_id=event_id)
+    if depth is not None:
+        rows = rows.filter(depth__lte=depth)
+    rows = rows.order_by('depth', other).values(
+        other, 'depth', f'{other}__title_is', f'{other}__date_start', f'{other}__date_end')
+
+    events = [{
+        'id': row[other],
+        'title': row[f'{other}__title_is'],
+        'date_start': row[f'{other}__date_start'],
+        'date_end': row[f'{other}__date_end'],
+        'depth': row['depth'],
+    } for row in rows[:MAX_CHAIN_EVENTS + 1]]
+    return JsonResponse({
+        'event': event_id,
+        'direction': direction,
+        'depth': depth,
+        'events': events[:MAX_CHAIN_EVENTS],
+        'truncated': len(events) > MAX_CHAIN_EVENTS,
+    })
+
+@cache_public_page
+def causal_path(request):
+    """JSON shortest cause-to-effect chain between ?from= and ?to=, tried in both orders"""
+    try:
+        source_id = int(request.GET['from'])
+        target_id = int(request.GET['to'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'from and to must be event ids'}, status=400)
 
-    return JsonResponse({'events': events_data})
+    # The closure answers reachability; only connected pairs walk the graph
+    link = CausalClosure.objects.filter(
+        Q(ancestor_id=source_id, descendant_id=target_id) | Q(ancestor_id=target_id, descendant_id=source_id)
+    ).values_list('ancestor_id', 'descendant_id').first()
+    if link is None:
+        return JsonResponse({'path': None})
+    path = relation_graph.get().shortest_path(*link)
+    if path is None:
+        return JsonResponse({'path': None})
+    summaries = _event_summaries(path)
+    return JsonResponse({'path': [summaries[event_id] for event_id in path if event_id in summaries]})